@@ -0,0 +1 @@
+"""Хелперы для работы с API Кинопоиска."""
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from api.rate_limit import (RETRY_STATUSES, SharedTokenBucket, backoff_delay,
+                            bucket_from_env, retry_after)
+
+Params = Optional[Dict[str, Any]]
+
+
+class AsyncResponse:
+    """Ответ асинхронного клиента: статус, JSON и время запроса."""
+
+    def __init__(self, url: str, status: int, data: Any,
+                 elapsed: float) -> None:
+        self.url = url
+        self.status_code = status
+        self.data = data
+        self.elapsed = elapsed
+
+    def json(self) -> Any:
+        return self.data
+
+
+class AsyncApiClient:
+    """Асинхронный клиент API с пулом keep-alive соединений и ограничением
+    числа одновременных запросов.
+
+    Частота запросов ограничивается тем же общим token bucket, что и у
+    синхронной сессии (API_RATE_LIMIT), ответы 429/503 повторяются с
+    учётом Retry-After.
+
+        async with AsyncApiClient(API_KEY, API_URL) as client:
+            responses = await client.gather(
+                ("/v1.4/movie", {"year": year}) for year in years)
+    """
+
+    def __init__(self, api_key: str, base_url: str, concurrency: int = 20,
+                 timeout: float = 30.0,
+                 bucket: Optional[SharedTokenBucket] = None,
+                 max_retries: int = 5, backoff: float = 0.5,
+                 max_backoff: float = 30.0) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._own_bucket = bucket is None
+        self.bucket = bucket if bucket is not None else bucket_from_env()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.throttled_time = 0.0
+        self.retried = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncApiClient':
+        self._session = aiohttp.ClientSession(
+            headers={"X-API-KEY": self.api_key,
+                     "accept": "application/json"},
+            connector=aiohttp.TCPConnector(limit=self.concurrency,
+                                           keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._own_bucket and self.bucket is not None:
+            self.bucket.close()
+            self.bucket = None
+
+    async def get(self, path: str, params: Params = None) -> AsyncResponse:
+        """GET запрос; параметры приводятся к строкам, как в requests."""
+        if self._session is None:
+            raise RuntimeError("Клиент нужно открыть через 'async with'")
+        query = [
+            (key, str(item))
+            for key, value in (params or {}).items()
+            for item in (value if isinstance(value, (list, tuple))
+                         else [value])
+        ]
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.throttled_time += await self.bucket.acquire_async()
+            async with self._semaphore:
+                started = time.perf_counter()
+                async with self._session.get(url, params=query) as response:
+                    if (response.status not in RETRY_STATUSES or
+                            attempt >= self.max_retries):
+                        try:
+                            data = await response.json(content_type=None)
+                        except ValueError:
+                            # Тело не JSON (страница ошибки 429/503/5xx)
+                            data = None
+                        return AsyncResponse(str(response.url),
+                                             response.status, data,
+                                             time.perf_counter() - started)
+                    delay = retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff, self.max_backoff)
+            if self.bucket is not None:
+                self.bucket.block(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+            self.retried += 1
+
+    async def gather(
+        self, requests: Iterable[Tuple[str, Params]]
+    ) -> List[AsyncResponse]:
+        """Все запросы одновременно (в пределах concurrency)."""
+        return await asyncio.gather(
+            *(self.get(path, params) for path, params in requests))
+
+    async def movies(self, ids: Iterable[int]) -> List[AsyncResponse]:
+        """Детальная информация по списку ID фильмов."""
+        return await self.gather((f"/v1.4/movie/{movie_id}", None)
+                                 for movie_id in ids)
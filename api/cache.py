@@ -0,0 +1,172 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from api.cassette import build_response, normalize_url, stored_headers
+
+# Время жизни ответа по пути запроса, первое совпадение
+DEFAULT_TTL: Sequence[Tuple[str, float]] = (
+    (r'^/v1\.4/movie/\d+$', 86400.0),
+    (r'^/v1\.4/movie/search$', 3600.0),
+    (r'^/v1\.4/movie$', 600.0),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    reason TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access);
+"""
+
+
+class CacheAdapter(BaseAdapter):
+    """Общий дисковый кэш GET-ответов API.
+
+    Ключ - нормализованный URL и API-ключ. Свежий ответ отдаётся без
+    запроса; устаревший с ETag перепроверяется через If-None-Match.
+    Размер ограничен ``max_bytes``, вытесняются давно не читавшиеся
+    записи. SQLite в режиме WAL позволяет читать и писать из нескольких
+    воркеров одновременно.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 200 * 1024 * 1024,
+                 ttl: Sequence[Tuple[str, float]] = DEFAULT_TTL,
+                 default_ttl: float = 0.0,
+                 inner: Optional[BaseAdapter] = None) -> None:
+        super().__init__()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = [(re.compile(pattern), seconds) for pattern, seconds in ttl]
+        self.default_ttl = default_ttl
+        self.inner = inner or HTTPAdapter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def ttl_for(self, url: str) -> float:
+        path = urlsplit(url).path.rstrip('/')
+        for pattern, seconds in self.ttl:
+            if pattern.search(path):
+                return seconds
+        return self.default_ttl
+
+    @staticmethod
+    def key(request: PreparedRequest) -> str:
+        api_key = request.headers.get('X-API-KEY', '')
+        raw = f"{normalize_url(request.url or '')} {api_key}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _get(self, key: str) -> Optional[Tuple[Any, ...]]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status, reason, headers, body, etag, expires "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    (time.time(), key))
+        return row
+
+    def _put(self, key: str, response: Response, ttl: float) -> None:
+        body = response.content
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status_code, response.reason,
+                 stored_headers(response), body,
+                 response.headers.get('ETag'), len(body), now + ttl, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Удаление самых давно прочитанных записей сверх лимита."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _refresh(self, key: str, ttl: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE responses SET expires = ? WHERE key = ?",
+                (time.time() + ttl, key))
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        ttl = self.ttl_for(request.url or '')
+        if request.method != 'GET' or ttl <= 0:
+            return self.inner.send(request, **kwargs)
+
+        key = self.key(request)
+        row = self._get(key)
+        if row is not None:
+            status, reason, headers, body, etag, expires = row
+            if time.time() < expires:
+                self.hits += 1
+                self.bytes_saved += len(body)
+                return build_response(request, status, reason, headers, body)
+            if etag:
+                conditional = request.copy()
+                conditional.headers['If-None-Match'] = etag
+                response = self.inner.send(conditional, **kwargs)
+                if response.status_code == 304:
+                    self._refresh(key, ttl)
+                    self.revalidated += 1
+                    self.bytes_saved += len(body)
+                    return build_response(request, status, reason, headers,
+                                          body)
+                self.misses += 1
+                if response.status_code == 200:
+                    self._put(key, response, ttl)
+                return response
+
+        self.misses += 1
+        response = self.inner.send(request, **kwargs)
+        if response.status_code == 200:
+            self._put(key, response, ttl)
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+        with self._lock:
+            self._conn.close()
+
+    def report(self) -> str:
+        total = self.hits + self.revalidated + self.misses
+        ratio = (self.hits + self.revalidated) / total if total else 0.0
+        return (f"Кэш ответов: попаданий {self.hits}, перепроверено "
+                f"{self.revalidated}, промахов {self.misses} "
+                f"({ratio:.0%}), сэкономлено байт {self.bytes_saved}")
@@ -0,0 +1,168 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+MODES = ('off', 'record', 'replay', 'refresh', 'all')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cassettes (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    reason TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    recorded_at REAL NOT NULL
+)
+"""
+
+
+class CassetteMiss(ConnectionError):
+    """Запроса нет в кассете, а режим не разрешает ходить в сеть."""
+
+
+def normalize_url(url: str) -> str:
+    """URL с отсортированными параметрами запроса."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path,
+                       query, ''))
+
+
+def request_key(request: PreparedRequest) -> str:
+    """Ключ кассеты: метод + нормализованный URL + тело запроса."""
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    raw = f"{request.method} {normalize_url(request.url or '')} ".encode()
+    return hashlib.sha1(raw + body).hexdigest()
+
+
+def build_response(request: PreparedRequest, status: int, reason: str,
+                   headers: str, body: bytes) -> Response:
+    """Объект Response из сохранённых статуса, заголовков (JSON) и тела."""
+    response = Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(json.loads(headers))
+    response._content = body
+    # Тело уже прочитано: iter_content/iter_lines отдают его из _content,
+    # raw нужен тем, кто читает response.raw напрямую
+    response._content_consumed = True
+    response.raw = io.BytesIO(body)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url or ''
+    response.request = request
+    return response
+
+
+def stored_headers(response: Response) -> str:
+    """Заголовки ответа для сохранения (без сжатия и cookies), JSON."""
+    return json.dumps({
+        k: v for k, v in response.headers.items()
+        if k.lower() not in ('set-cookie', 'content-encoding',
+                             'transfer-encoding')
+    })
+
+
+class CassetteStore:
+    """Кассеты в одном SQLite-файле с доступом по ключу."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT status, reason, headers, body, recorded_at "
+                "FROM cassettes WHERE key = ?", (key,)
+            ).fetchone()
+
+    def put(self, key: str, request: PreparedRequest,
+            response: Response) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cassettes VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, request.method, normalize_url(request.url or ''),
+                 response.status_code, response.reason,
+                 stored_headers(response),
+                 response.content, time.time())
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CassetteAdapter(BaseAdapter):
+    """Транспорт requests с записью и воспроизведением ответов.
+
+    Режимы: ``record`` - отдаёт записанное, новое записывает; ``replay`` -
+    только из кассеты, без сети; ``refresh`` - перезаписывает ответы
+    старше ``max_age`` секунд; ``all`` - всегда сеть и перезапись.
+    """
+
+    def __init__(self, store: CassetteStore, mode: str = 'record',
+                 max_age: float = 7 * 86400,
+                 inner: Optional[BaseAdapter] = None) -> None:
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим кассет: {mode}")
+        self.store = store
+        self.mode = mode
+        self.max_age = max_age
+        self.inner = inner or HTTPAdapter()
+        self.hits = 0
+        self.recorded = 0
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        if self.mode == 'off':
+            return self.inner.send(request, **kwargs)
+
+        key = request_key(request)
+        row = self.store.get(key) if self.mode != 'all' else None
+        if row is not None:
+            expired = (self.mode == 'refresh' and
+                       time.time() - row[4] > self.max_age)
+            if not expired:
+                self.hits += 1
+                return build_response(request, *row[:4])
+        if self.mode == 'replay':
+            raise CassetteMiss(
+                f"Нет записи в кассете: {request.method} {request.url}",
+                request=request)
+
+        response = self.inner.send(request, **kwargs)
+        if response.status_code < 500 and response.status_code != 429:
+            self.store.put(key, request, response)
+            self.recorded += 1
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+        self.store.close()
+
+    def report(self) -> str:
+        return (f"Кассеты ({self.mode}): воспроизведено {self.hits}, "
+                f"записано {self.recorded}")
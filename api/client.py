@@ -0,0 +1,67 @@
+import os
+from typing import List
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from api.cache import CacheAdapter
+from api.cassette import CassetteAdapter, CassetteStore
+from api.rate_limit import RateLimitAdapter, bucket_from_env
+
+
+def create_session(api_key: str) -> requests.Session:
+    """Сессия requests с заголовками API и транспортом из настроек окружения.
+
+    Слои транспорта (снаружи внутрь): кассеты -> кэш ответов ->
+    ограничение частоты -> сеть.
+
+    API_CASSETTE_MODE: off (по умолчанию), record, replay, refresh, all.
+    API_CACHE: 1 - включить общий дисковый кэш GET-ответов.
+    API_RATE_LIMIT: запросов в секунду на все воркеры (по умолчанию 0 -
+    без ограничения); ответы 429/503 повторяются в любом случае
+    (API_MAX_RETRIES).
+    """
+    session = requests.Session()
+    session.headers.update({
+        "X-API-KEY": api_key,
+        "accept": "application/json"
+    })
+
+    adapter: BaseAdapter = HTTPAdapter()
+
+    # Повторы 429/503 есть всегда, token bucket - только с API_RATE_LIMIT
+    adapter = RateLimitAdapter(
+        bucket_from_env(),
+        max_retries=int(os.getenv('API_MAX_RETRIES', '5')),
+        inner=adapter,
+    )
+
+    if os.getenv('API_CACHE', '0') == '1':
+        adapter = CacheAdapter(
+            os.getenv('API_CACHE_PATH', '.cache/api_cache.sqlite'),
+            max_bytes=int(os.getenv('API_CACHE_MAX_MB', '200')) * 1024 * 1024,
+            inner=adapter,
+        )
+
+    mode = os.getenv('API_CASSETTE_MODE', 'off')
+    if mode != 'off':
+        store = CassetteStore(
+            os.getenv('API_CASSETTE_PATH', 'cassettes/kinopoisk.sqlite'))
+        max_age = float(os.getenv('API_CASSETTE_MAX_AGE_DAYS', '7')) * 86400
+        adapter = CassetteAdapter(store, mode=mode, max_age=max_age,
+                                  inner=adapter)
+
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def session_report(session: requests.Session) -> str:
+    """Сводка по всем слоям транспорта сессии."""
+    lines: List[str] = []
+    adapter = session.get_adapter('https://')
+    while adapter is not None:
+        if hasattr(adapter, 'report'):
+            lines.append(adapter.report())
+        adapter = getattr(adapter, 'inner', None)
+    return "\n".join(lines)
@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Колонка -> (тип numpy, код для array.array); -1/NaN - нет значения
+COLUMNS = {
+    'id': (np.int64, 'q'),
+    'year': (np.int16, 'h'),
+    'rating_kp': (np.float32, 'f'),
+    'votes_kp': (np.int32, 'i'),
+    'type': (np.int8, 'b'),
+}
+
+Predicate = Callable[['CatalogSnapshot'], np.ndarray]
+
+
+class InvariantResult:
+    """Результат векторной проверки: сколько строк нарушают условие."""
+
+    def __init__(self, name: str, rows: int, violations: np.ndarray,
+                 elapsed: float) -> None:
+        self.name = name
+        self.rows = rows
+        self.violations = violations
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return len(self.violations) == 0
+
+    def __str__(self) -> str:
+        status = "✅" if self.ok else "❌"
+        return (f"{status} {self.name}: нарушений {len(self.violations)} "
+                f"из {self.rows} ({self.elapsed * 1000:.1f} ms)")
+
+
+class CatalogSnapshot:
+    """Снимок выдачи API в колонках NumPy для векторных проверок.
+
+    Колонки можно сохранить в .npy и открыть через memory-map, чтобы не
+    загружать миллионы строк в память. Названия фильмов хранятся
+    отдельным списком только для отчёта о нарушениях.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], types: List[str],
+                 names: Optional[List[Optional[str]]] = None) -> None:
+        self.columns = columns
+        self.types = types
+        self.names = names or []
+
+    def __len__(self) -> int:
+        return len(self.columns['id'])
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_docs(cls, docs: Iterable[Dict[str, Any]]) -> 'CatalogSnapshot':
+        """Сборка снимка из потока документов без хранения самих документов."""
+        buffers = {name: array(code) for name, (_, code) in COLUMNS.items()}
+        types: List[str] = []
+        type_codes: Dict[str, int] = {}
+        names: List[Optional[str]] = []
+        for doc in docs:
+            movie_id = doc.get('id')
+            rating = (doc.get('rating') or {}).get('kp')
+            votes = (doc.get('votes') or {}).get('kp')
+            kind = doc.get('type')
+            if kind is not None and kind not in type_codes:
+                type_codes[kind] = len(types)
+                types.append(kind)
+            buffers['id'].append(-1 if movie_id is None else movie_id)
+            names.append(doc.get('name'))
+            buffers['year'].append(doc.get('year') or -1)
+            buffers['rating_kp'].append(
+                float('nan') if rating is None else rating)
+            buffers['votes_kp'].append(-1 if votes is None else votes)
+            buffers['type'].append(type_codes.get(kind, -1))
+        columns = {
+            name: np.frombuffer(buffers[name], dtype=dtype).copy()
+            if len(buffers[name]) else np.empty(0, dtype=dtype)
+            for name, (dtype, _) in COLUMNS.items()
+        }
+        return cls(columns, types, names)
+
+    def save(self, directory: str) -> None:
+        """Сохранение колонок в .npy и справочника типов в meta.json."""
+        os.makedirs(directory, exist_ok=True)
+        for name, values in self.columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+        with open(os.path.join(directory, 'meta.json'), 'w',
+                  encoding='utf-8') as f:
+            json.dump({'types': self.types, 'rows': len(self)}, f,
+                      ensure_ascii=False)
+        with open(os.path.join(directory, 'names.json'), 'w',
+                  encoding='utf-8') as f:
+            json.dump(self.names, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'CatalogSnapshot':
+        """Открытие сохранённого снимка (по умолчанию через memory-map)."""
+        with open(os.path.join(directory, 'meta.json'),
+                  encoding='utf-8') as f:
+            meta = json.load(f)
+        columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"),
+                          mmap_mode='r' if mmap else None)
+            for name in COLUMNS
+        }
+        names = None
+        names_path = os.path.join(directory, 'names.json')
+        if os.path.exists(names_path):
+            with open(names_path, encoding='utf-8') as f:
+                names = json.load(f)
+        return cls(columns, meta['types'], names)
+
+    def check(self, name: str, predicate: Predicate) -> InvariantResult:
+        """Векторная проверка: predicate возвращает маску допустимых строк."""
+        started = time.perf_counter()
+        mask = np.asarray(predicate(self), dtype=bool)
+        violations = np.flatnonzero(~mask)
+        return InvariantResult(name, len(self), violations,
+                               time.perf_counter() - started)
+
+    def duplicate_ids(self) -> np.ndarray:
+        """ID, которые встречаются больше одного раза (без -1: документы
+        без id повторами не считаются)."""
+        ids = self.columns['id']
+        ids, counts = np.unique(ids[ids != -1], return_counts=True)
+        return ids[counts > 1]
+
+    def rows(self, indexes: np.ndarray,
+             limit: int = 50) -> List[Dict[str, Any]]:
+        """Строки снимка по индексам (для отчёта о нарушениях)."""
+        result = []
+        for i in indexes[:limit]:
+            row = {name: values[i].item()
+                   for name, values in self.columns.items()}
+            row['name'] = self.names[i] if i < len(self.names) else None
+            code = row['type']
+            row['type'] = self.types[code] if 0 <= code < len(self.types) \
+                else None
+            result.append(row)
+        return result
+
+    def summary(self, results: Iterable[InvariantResult],
+                limit: int = 50) -> str:
+        """Сводка проверок с нарушающими строками (не больше limit)."""
+        payload: Dict[str, Any] = {'rows': len(self), 'checks': []}
+        for result in results:
+            payload['checks'].append({
+                'name': result.name,
+                'violations': int(len(result.violations)),
+                'elapsed_ms': round(result.elapsed * 1000, 3),
+                'violating_rows': self.rows(result.violations, limit),
+            })
+        return json.dumps(payload, ensure_ascii=False, indent=2)
+
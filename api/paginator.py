@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+import requests
+
+from api.projection import select_fields, stream_docs
+
+
+class Paginator:
+    """Постраничный обход выдачи API с предзагрузкой следующих страниц.
+
+    Документы отдаются по одному; в памяти одновременно не больше
+    ``prefetch + 1`` страниц, а ``fields`` ограничивает поля документов
+    (selectFields). Если указан ``checkpoint``, номер следующей
+    страницы сохраняется в файл, и после сбоя обход продолжается с неё.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        limit: int = 250,
+        prefetch: int = 2,
+        max_pages: Optional[int] = None,
+        checkpoint: Optional[str] = None,
+        retries: int = 3,
+        fields: Tuple[str, ...] = (),
+    ) -> None:
+        self.session = session
+        self.url = url
+        self.params = dict(params or {})
+        if fields:
+            self.params.update(select_fields(*fields))
+        self.limit = limit
+        self.prefetch = max(0, prefetch)
+        self.max_pages = max_pages
+        self.checkpoint = checkpoint
+        self.retries = retries
+        self.pages = 0
+        self.docs = 0
+        self.elapsed = 0.0
+        self.total_pages: Optional[int] = None
+        self.start_page = 1
+
+    def _checkpoint_key(self) -> str:
+        return json.dumps([self.url, self.params, self.limit], sort_keys=True)
+
+    def _load_checkpoint(self) -> int:
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 1
+        try:
+            with open(self.checkpoint, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 1
+        if state.get('key') != self._checkpoint_key():
+            return 1
+        return int(state.get('next_page', 1))
+
+    def _save_checkpoint(self, next_page: int) -> None:
+        if not self.checkpoint:
+            return
+        directory = os.path.dirname(self.checkpoint)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'key': self._checkpoint_key(),
+                       'next_page': next_page}, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _fetch(self, page: int) -> Dict[str, Any]:
+        """Страница выдачи; ответ разбирается потоково, без копии всего
+        тела в памяти."""
+        params = dict(self.params, page=page, limit=self.limit)
+        for attempt in range(1, self.retries + 1):
+            try:
+                stream = stream_docs(self.session, self.url, params)
+                docs = list(stream)
+                return dict(stream.meta, docs=docs)
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+                time.sleep(0.5 * 2 ** (attempt - 1))
+        raise RuntimeError("unreachable")
+
+    def _last_page(self) -> Optional[int]:
+        last = self.total_pages
+        if self.max_pages is not None:
+            limit = self.start_page + self.max_pages - 1
+            last = limit if last is None else min(last, limit)
+        return last
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.start_page = self._load_checkpoint()
+        started = time.perf_counter()
+        window: Deque[Tuple[int, Future]] = deque()
+        next_to_submit = self.start_page
+
+        with ThreadPoolExecutor(max_workers=self.prefetch + 1,
+                                thread_name_prefix='paginator') as pool:
+            def fill() -> None:
+                nonlocal next_to_submit
+                while len(window) <= self.prefetch:
+                    last = self._last_page()
+                    if last is not None and next_to_submit > last:
+                        return
+                    # Пока число страниц неизвестно, грузим только первую
+                    if self.total_pages is None and window:
+                        return
+                    window.append(
+                        (next_to_submit, pool.submit(self._fetch,
+                                                     next_to_submit)))
+                    next_to_submit += 1
+
+            fill()
+            while window:
+                page, future = window.popleft()
+                try:
+                    data = future.result()
+                except Exception:
+                    for _, pending in window:
+                        pending.cancel()
+                    raise
+                if self.total_pages is None:
+                    self.total_pages = int(data.get('pages') or page)
+                docs = data.get('docs', [])
+                fill()
+                del data
+                for doc in docs:
+                    self.docs += 1
+                    yield doc
+                self.pages += 1
+                self.elapsed = time.perf_counter() - started
+                self._save_checkpoint(page + 1)
+                if not docs:
+                    break
+
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def report(self) -> str:
+        """Скорость обхода: страниц и документов в секунду."""
+        elapsed = self.elapsed or 1e-9
+        return (f"Страниц: {self.pages}, документов: {self.docs}, "
+                f"{self.pages / elapsed:.1f} стр/с, "
+                f"{self.docs / elapsed:.1f} док/с")
@@ -0,0 +1,139 @@
+import codecs
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]}'
+
+
+def select_fields(*fields: str) -> Dict[str, List[str]]:
+    """Параметр selectFields для полей, которые нужны проверке.
+
+    Вложенные поля сводятся к верхнему уровню ('rating.kp' -> 'rating'),
+    id запрашивается всегда.
+    """
+    top = ['id']
+    for field in fields:
+        name = field.split('.', 1)[0]
+        if name not in top:
+            top.append(name)
+    return {'selectFields': top}
+
+
+class DocsStream:
+    """Потоковый разбор ответа ``{"docs": [...], ...}``.
+
+    Документы из ``docs`` отдаются по одному по мере чтения ответа, в
+    памяти держится только текущий документ и непрочитанный хвост
+    буфера. Остальные поля верхнего уровня (page, limit, total, pages)
+    попадают в ``meta``.
+    """
+
+    def __init__(self, response: requests.Response,
+                 chunk_size: int = 64 * 1024) -> None:
+        self.response = response
+        self.meta: Dict[str, Any] = {}
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+
+    def _more(self) -> bool:
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer = self._buffer[self._pos:] + text
+                self._pos = 0
+                return True
+        return False
+
+    def _skip(self) -> str:
+        """Пропуск пробелов; возвращает следующий символ."""
+        while True:
+            while (self._pos < len(self._buffer) and
+                   self._buffer[self._pos] in _WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._more():
+                raise ValueError("Неожиданный конец JSON")
+
+    def _expect(self, char: str) -> None:
+        if self._skip() != char:
+            raise ValueError(f"Ожидался '{char}' на позиции {self._pos}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._skip()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._more():
+                    raise
+                continue
+            # Число могло оборваться на границе чанка ("2." или "1e"):
+            # принимаем его только если за ним идёт разделитель
+            if (isinstance(value, (int, float)) and
+                    not isinstance(value, bool)):
+                if end == len(self._buffer):
+                    if self._more():
+                        continue
+                elif self._buffer[end] not in _DELIMITERS:
+                    if self._more():
+                        continue
+                    raise ValueError(f"Некорректное число на позиции {end}")
+            self._pos = end
+            return value
+
+    def _docs(self) -> Iterator[Dict[str, Any]]:
+        self._expect('[')
+        if self._skip() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            char = self._skip()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Ожидался ',' на позиции {self._pos}")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        try:
+            self._expect('{')
+            if self._skip() == '}':
+                return
+            while True:
+                key = self._value()
+                self._expect(':')
+                if key == 'docs':
+                    yield from self._docs()
+                else:
+                    self.meta[key] = self._value()
+                char = self._skip()
+                self._pos += 1
+                if char == '}':
+                    return
+                if char != ',':
+                    raise ValueError(f"Ожидался ',' на позиции {self._pos}")
+        finally:
+            self.response.close()
+
+
+def stream_docs(
+    session: requests.Session, url: str,
+    params: Optional[Dict[str, Any]] = None,
+    fields: Tuple[str, ...] = (),
+) -> DocsStream:
+    """GET с потоковым разбором docs и проекцией полей (если заданы)."""
+    query = dict(params or {})
+    if fields:
+        query.update(select_fields(*fields))
+    response = session.get(url, params=query, stream=True)
+    response.raise_for_status()
+    return DocsStream(response)
@@ -0,0 +1,198 @@
+import asyncio
+import email.utils
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+RETRY_STATUSES = (429, 503)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    blocked_until REAL NOT NULL
+)
+"""
+
+
+class SharedTokenBucket:
+    """Token bucket, общий для всех процессов через SQLite-файл.
+
+    ``BEGIN IMMEDIATE`` даёт межпроцессную блокировку на время
+    пересчёта токенов, поэтому воркеры pytest расходуют одну квоту.
+    """
+
+    def __init__(self, path: str, rate: float, burst: float) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO bucket VALUES (1, ?, ?, 0)",
+            (self.burst, time.time()))
+
+    def _take(self) -> float:
+        """Попытка взять токен; возвращает, сколько ещё ждать (0 - взят)."""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated, blocked_until = conn.execute(
+                    "SELECT tokens, updated, blocked_until FROM bucket"
+                ).fetchone()
+                now = time.time()
+                if now < blocked_until:
+                    conn.execute("COMMIT")
+                    return blocked_until - now
+                tokens = min(self.burst,
+                             tokens + (now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute(
+                    "UPDATE bucket SET tokens = ?, updated = ?",
+                    (tokens, now))
+                conn.execute("COMMIT")
+                return wait
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def acquire(self) -> float:
+        """Ожидание токена; возвращает время ожидания в секундах."""
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self) -> float:
+        """То же, что acquire(), но без блокировки цикла событий."""
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def block(self, seconds: float) -> None:
+        """Пауза для всех процессов (например, по Retry-After)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bucket SET blocked_until = MAX(blocked_until, ?)",
+                (time.time() + seconds,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def bucket_from_env() -> Optional[SharedTokenBucket]:
+    """Общий token bucket по API_RATE_LIMIT (запросов в секунду на все
+    воркеры, 0 - без ограничения) и API_RATE_BURST."""
+    rate = float(os.getenv('API_RATE_LIMIT', '0'))
+    if rate <= 0:
+        return None
+    return SharedTokenBucket(
+        os.getenv('API_RATE_STATE', '.cache/rate_limit.sqlite'),
+        rate=rate,
+        burst=float(os.getenv('API_RATE_BURST', str(rate))),
+    )
+
+
+def backoff_delay(attempt: int, backoff: float, max_backoff: float) -> float:
+    """Экспоненциально растущая пауза со случайным разбросом."""
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def retry_after(response: Any) -> Optional[float]:
+    """Значение Retry-After в секундах (число или HTTP-дата).
+
+    Подходит для ответов и requests, и aiohttp.
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class RateLimitAdapter(BaseAdapter):
+    """Транспорт requests с повтором при 429/503 и ограничением частоты.
+
+    Учитывает Retry-After, иначе ждёт экспоненциально растущую паузу со
+    случайным разбросом. Без ``bucket`` частота не ограничивается, но
+    повторы работают. Считает время ожидания квоты отдельно от времени
+    в сети.
+    """
+
+    def __init__(self, bucket: Optional[SharedTokenBucket] = None,
+                 max_retries: int = 5,
+                 backoff: float = 0.5, max_backoff: float = 30.0,
+                 inner: Optional[BaseAdapter] = None) -> None:
+        super().__init__()
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.inner = inner or HTTPAdapter()
+        self.throttled_time = 0.0
+        self.network_time = 0.0
+        self.retried = 0
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.throttled_time += self.bucket.acquire()
+            started = time.perf_counter()
+            response = self.inner.send(request, **kwargs)
+            self.network_time += time.perf_counter() - started
+            if (response.status_code not in RETRY_STATUSES or
+                    attempt >= self.max_retries):
+                return response
+
+            delay = retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff, self.max_backoff)
+            if self.bucket is not None:
+                self.bucket.block(delay)
+            else:
+                time.sleep(delay)
+            response.close()
+            attempt += 1
+            self.retried += 1
+
+    def close(self) -> None:
+        self.inner.close()
+        if self.bucket is not None:
+            self.bucket.close()
+
+    def report(self) -> str:
+        return (f"Ограничение частоты: ожидание квоты "
+                f"{self.throttled_time:.2f}s, сеть {self.network_time:.2f}s, "
+                f"повторов {self.retried}")
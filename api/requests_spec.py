@@ -0,0 +1,29 @@
+from typing import Any, Dict, Tuple
+
+from api.projection import select_fields
+
+# Запросы API-тестов: имя -> (путь, параметры). Общие для
+# tests_test_api.py и нагрузочного прогона tools.bench.
+REQUESTS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    'key_valid': ("/v1.4/movie", {"limit": 1, **select_fields()}),
+    'search': ("/v1.4/movie/search",
+               {"query": "Школа", "limit": 10,
+                **select_fields("name", "year")}),
+    'high_rated': ("/v1.4/movie",
+                   {"rating.kp": "8-10", "sortField": "rating.kp",
+                    "sortType": "-1", "limit": 5,
+                    **select_fields("name", "rating.kp")}),
+    'by_year': ("/v1.4/movie",
+                {"year": "2023", "limit": 5,
+                 **select_fields("name", "year")}),
+    'details': ("/v1.4/movie/493098", {}),  # ID фильма "Школа"
+    'pagination': ("/v1.4/movie",
+                   {"page": 1, "limit": 2, **select_fields()}),
+}
+
+
+def api_request(name: str, **overrides: Any) -> Tuple[str, Dict[str, Any]]:
+    """Путь и копия параметров запроса ``name`` с заменой отдельных
+    параметров: ``api_request('by_year', year=2020)``."""
+    path, params = REQUESTS[name]
+    return path, {**params, **overrides}
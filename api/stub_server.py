@@ -0,0 +1,401 @@
+"""Локальная замена API kinopoisk.dev для разработки и нагрузочных прогонов.
+
+Реализует эндпоинты, которые используют тесты: ``/v1.4/movie``,
+``/v1.4/movie/search`` и ``/v1.4/movie/{id}``. Каталог генерируется
+детерминированно и обслуживается из заранее построенных индексов.
+
+    python -m api.stub_server --port 8765 --movies 100000
+    KINOPOISK_API_URL=http://127.0.0.1:8765 pytest tests_test_api.py
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+WORDS = [
+    'школа', 'город', 'ночь', 'любовь', 'война', 'дом', 'море', 'зима',
+    'лето', 'брат', 'сестра', 'время', 'дорога', 'небо', 'звезда', 'сон',
+    'тайна', 'остров', 'поезд', 'друг', 'враг', 'герой', 'король', 'мир',
+    'огонь', 'вода', 'лес', 'путь', 'память', 'семья', 'игра', 'охота',
+]
+TYPES = ['movie', 'tv-series', 'cartoon', 'anime', 'animated-series']
+GENRES = ['драма', 'комедия', 'боевик', 'триллер', 'мелодрама', 'фантастика',
+          'ужасы', 'детектив', 'приключения', 'мультфильм']
+
+# Фильмы, на которые опираются тесты
+KNOWN_MOVIES = [
+    (493098, 'Школа', 2010, 7.1, 500000, 'tv-series'),
+    (468005, 'Школа', 2010, 7.1, 500000, 'tv-series'),
+]
+
+
+class Catalog:
+    """Каталог фильмов в колонках и индексы по году, рейтингу и словам."""
+
+    def __init__(self, size: int = 100_000, seed: int = 2010) -> None:
+        rnd = random.Random(seed)
+        self.ids: List[int] = []
+        self.names: List[str] = []
+        self.years: List[int] = []
+        self.ratings: List[float] = []
+        self.votes: List[int] = []
+        self.types: List[str] = []
+        self.genres: List[Tuple[str, ...]] = []
+
+        known_ids = {movie[0] for movie in KNOWN_MOVIES}
+        for movie in KNOWN_MOVIES:
+            self._add(*movie, genres=('комедия', 'драма'))
+        next_id = 1
+        while len(self.ids) < size:
+            if next_id in known_ids:
+                next_id += 1
+                continue
+            words = rnd.sample(WORDS, rnd.randint(1, 3))
+            self._add(
+                next_id,
+                ' '.join(words).capitalize(),
+                rnd.randint(1950, 2025),
+                round(min(10.0, max(1.0, rnd.gauss(6.5, 1.2))), 1),
+                int(rnd.paretovariate(1.2) * 100),
+                rnd.choice(TYPES),
+                genres=tuple(rnd.sample(GENRES, rnd.randint(1, 3))),
+            )
+            next_id += rnd.randint(1, 5)
+        self._build_indexes()
+
+    def _add(self, movie_id: int, name: str, year: int, rating: float,
+             votes: int, kind: str, genres: Tuple[str, ...]) -> None:
+        self.ids.append(movie_id)
+        self.names.append(name)
+        self.years.append(year)
+        self.ratings.append(rating)
+        self.votes.append(votes)
+        self.types.append(kind)
+        self.genres.append(genres)
+
+    def _build_indexes(self) -> None:
+        count = len(self.ids)
+        self.by_id = {movie_id: i for i, movie_id in enumerate(self.ids)}
+        self.by_year: Dict[int, List[int]] = defaultdict(list)
+        self.by_word: Dict[str, List[int]] = defaultdict(list)
+        for i in range(count):
+            self.by_year[self.years[i]].append(i)
+            for word in set(tokenize(self.names[i])):
+                self.by_word[word].append(i)
+        # Индексы по возрастанию рейтинга и ключи для bisect
+        self.rating_order = sorted(range(count), key=self.ratings.__getitem__)
+        self.rating_keys = [self.ratings[i] for i in self.rating_order]
+        self.sort_orders = {
+            'rating.kp': self.rating_order,
+            'year': sorted(range(count), key=self.years.__getitem__),
+            'votes.kp': sorted(range(count), key=self.votes.__getitem__),
+            'id': list(range(count)),
+        }
+
+    def doc(self, i: int) -> Dict[str, Any]:
+        """Документ фильма в формате kinopoisk.dev."""
+        return {
+            'id': self.ids[i],
+            'name': self.names[i],
+            'alternativeName': None,
+            'type': self.types[i],
+            'year': self.years[i],
+            'rating': {'kp': self.ratings[i],
+                       'imdb': round(self.ratings[i] * 0.95, 1)},
+            'votes': {'kp': self.votes[i], 'imdb': self.votes[i] // 3},
+            'genres': [{'name': genre} for genre in self.genres[i]],
+            'countries': [{'name': 'Россия'}],
+            'description': f"{self.names[i]} ({self.years[i]}).",
+            'persons': [
+                {'id': self.ids[i] * 10 + n, 'name': f"Актёр {n}",
+                 'profession': 'актеры'}
+                for n in range(5)
+            ],
+        }
+
+    def filter(self, year: Optional[str], rating: Optional[str],
+               sort_field: Optional[str], sort_type: str) -> List[int]:
+        """Индексы фильмов по фильтрам с сортировкой."""
+        candidates: Optional[List[int]] = None
+        if rating:
+            low, high = parse_range(rating, float)
+            left = bisect.bisect_left(self.rating_keys, low)
+            right = bisect.bisect_right(self.rating_keys, high)
+            candidates = self.rating_order[left:right]
+        if year:
+            low, high = parse_range(year, int)
+            by_year = [i for y in range(int(low), int(high) + 1)
+                       for i in self.by_year.get(y, ())]
+            if candidates is None:
+                candidates = by_year
+            else:
+                allowed = set(by_year)
+                candidates = [i for i in candidates if i in allowed]
+
+        reverse = sort_type == '-1'
+        if candidates is None:
+            order = self.sort_orders.get(sort_field or 'id',
+                                         self.sort_orders['id'])
+            return order[::-1] if reverse else order
+        if sort_field in self.sort_orders:
+            key = {
+                'rating.kp': self.ratings.__getitem__,
+                'year': self.years.__getitem__,
+                'votes.kp': self.votes.__getitem__,
+                'id': self.ids.__getitem__,
+            }[sort_field]
+            return sorted(candidates, key=key, reverse=reverse)
+        return sorted(candidates)
+
+    def search(self, query: str) -> List[int]:
+        """Поиск по словам названия: точные совпадения, затем по голосам."""
+        words = tokenize(query)
+        postings = [self.by_word.get(word, []) for word in words]
+        if not postings or not all(postings):
+            return []
+        postings.sort(key=len)
+        found = set(postings[0]).intersection(*postings[1:])
+        query_name = ' '.join(words)
+        return sorted(
+            found,
+            key=lambda i: (' '.join(tokenize(self.names[i])) != query_name,
+                           -self.votes[i])
+        )
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'\w+', text.lower())
+
+
+def parse_range(value: str, cast: Any) -> Tuple[Any, Any]:
+    """'8-10' -> (8, 10), '2023' -> (2023, 2023)."""
+    low, _, high = value.partition('-')
+    return cast(low), cast(high or low)
+
+
+def page_of(items: Sequence[Any], page: int, limit: int) -> Tuple[List[Any],
+                                                                   int]:
+    start = (page - 1) * limit
+    pages = (len(items) + limit - 1) // limit if limit else 0
+    return list(items[start:start + limit]), pages
+
+
+class StubServer:
+    """HTTP/1.1 сервер на asyncio с keep-alive и инъекцией задержек/ошибок."""
+
+    def __init__(
+        self,
+        catalog: Catalog,
+        api_key: Optional[str] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_429: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.catalog = catalog
+        self.api_key = api_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Открытые соединения: keep-alive клиентов закрываем сами, иначе
+        # wait_closed() (Python 3.12.1+) ждёт, пока их закроет клиент
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    # --- обработка запросов -------------------------------------------
+
+    def route(self, method: str, target: str,
+              headers: Dict[str, str]) -> Tuple[int, Dict[str, Any],
+                                                Dict[str, str]]:
+        """Ответ (статус, тело, доп. заголовки) на запрос."""
+        token = headers.get('x-api-key')
+        if not token or (self.api_key is not None and token != self.api_key):
+            return 401, {'statusCode': 401,
+                         'message': 'В запросе не указан или неверен токен'}, {}
+        roll = self.random.random()
+        if roll < self.rate_429:
+            return 429, {'statusCode': 429,
+                         'message': 'Too Many Requests'}, {'Retry-After': '1'}
+        if roll < self.rate_429 + self.error_rate:
+            return 500, {'statusCode': 500,
+                         'message': 'Internal Server Error'}, {}
+        if method != 'GET':
+            return 405, {'statusCode': 405, 'message': 'Method Not Allowed'}, {}
+
+        parts = urlsplit(target)
+        pairs = parse_qsl(parts.query)
+        params = dict(pairs)
+        fields = [value for key, value in pairs if key == 'selectFields']
+        path = parts.path.rstrip('/')
+        try:
+            page = max(1, int(params.get('page', 1)))
+            limit = min(250, max(1, int(params.get('limit', 10))))
+        except ValueError:
+            return 400, {'statusCode': 400,
+                         'message': 'page и limit должны быть числами'}, {}
+
+        catalog = self.catalog
+        if path == '/v1.4/movie':
+            try:
+                found = catalog.filter(
+                    params.get('year'), params.get('rating.kp'),
+                    params.get('sortField'), params.get('sortType', '1'))
+            except ValueError:
+                return 400, {'statusCode': 400,
+                             'message': 'Неверный формат фильтра'}, {}
+            return 200, self._page(found, page, limit, fields), {}
+        if path == '/v1.4/movie/search':
+            found = catalog.search(params.get('query', ''))
+            return 200, self._page(found, page, limit, fields), {}
+        match = re.fullmatch(r'/v1\.4/movie/(\d+)', path)
+        if match:
+            index = catalog.by_id.get(int(match.group(1)))
+            if index is None:
+                return 404, {'statusCode': 404,
+                             'message': 'Фильм не найден'}, {}
+            return 200, catalog.doc(index), {}
+        return 404, {'statusCode': 404, 'message': 'Not Found'}, {}
+
+    def _page(self, found: Sequence[int], page: int, limit: int,
+              fields: Sequence[str] = ()) -> Dict[str, Any]:
+        items, pages = page_of(found, page, limit)
+        docs = [self.catalog.doc(i) for i in items]
+        if fields:
+            docs = [{k: v for k, v in doc.items() if k in fields}
+                    for doc in docs]
+        return {
+            'docs': docs,
+            'total': len(found),
+            'limit': limit,
+            'page': page,
+            'pages': pages,
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode('latin-1').split(' ', 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                delay = self.latency_ms + self.random.uniform(
+                    -self.jitter_ms, self.jitter_ms)
+                if delay > 0:
+                    await asyncio.sleep(delay / 1000)
+
+                self.requests += 1
+                status, body, extra = self.route(method, target, headers)
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                head = [
+                    f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(payload)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                head.extend(f"{k}: {v}" for k, v in extra.items())
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+                             + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    # --- запуск ---------------------------------------------------------
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """Запуск сервера, возвращает фактический порт."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    def run_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запуск в фоновом потоке, возвращает базовый URL."""
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        future = asyncio.run_coroutine_threadsafe(self.start(host, port), loop)
+        threading.Thread(target=loop.run_forever, daemon=True,
+                         name='stub-server').start()
+        return f"http://{host}:{future.result(timeout=10)}"
+
+    def stop(self) -> None:
+        """Остановка сервера, запущенного через run_in_thread."""
+        if self._loop is None or self._server is None:
+            return
+        server, loop = self._server, self._loop
+
+        async def shutdown() -> None:
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized',
+           404: 'Not Found', 405: 'Method Not Allowed',
+           429: 'Too Many Requests', 500: 'Internal Server Error'}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--movies', type=int, default=100_000)
+    parser.add_argument('--api-key', default=None,
+                        help='ожидаемый X-API-KEY (по умолчанию любой)')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    catalog = Catalog(args.movies)
+    server = StubServer(catalog, api_key=args.api_key,
+                        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, rate_429=args.rate_429)
+
+    async def serve() -> None:
+        port = await server.start(args.host, args.port)
+        print(f"🎬 Stub API: http://{args.host}:{port} "
+              f"({len(catalog.ids)} фильмов)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
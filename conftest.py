@@ -0,0 +1,425 @@
+import json
+import os
+import uuid
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import allure
+import pytest
+from dotenv import load_dotenv
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from db import history, page_metrics
+from tools import instrumentation, parallel
+from ui.assertions import PageAssert
+from ui.checkpoints import CheckpointStore, FlowCheckpoints
+from ui.network import NetworkPolicy, summarize
+from ui.offline import OfflineRedirect, SnapshotServer, SnapshotStore
+from ui.pool import BrowserPool, launch_chrome
+from ui.probe import SelectorCache, SelectorProbe
+from ui.screenshots import ScreenshotRecorder, ScreenshotService
+from ui.state import SessionState, StateStore
+from ui.visual import VisualBaselines, VisualCheck
+from ui.vitals import PageMetrics
+from ui.waits import Waiter
+from ui.watchdog import MemoryWatchdog
+
+load_dotenv()
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "network_profile(name, allow=(), block=()): сетевой профиль "
+        "браузера (full, no-trackers, no-media, text-only)"
+    )
+    config.addinivalue_line(
+        "markers",
+        "perf_budget(**limits): бюджеты загрузки страниц теста, например "
+        "lcp_ms=2500, transfer_bytes=3_000_000"
+    )
+    if os.getenv('PERF_REPORT', '0') == '1':
+        instrumentation.enable()
+
+
+def pytest_collection_modifyitems(config: pytest.Config,
+                                  items: List[pytest.Item]) -> None:
+    """С TEST_ORDER=history сначала идут тесты, которые вероятнее всего
+    упадут (по истории в .cache/history.sqlite); по умолчанию порядок
+    файлов не меняется."""
+    if os.getenv('TEST_ORDER', 'file') != 'history':
+        return
+    stats = history.stats()
+    if not stats:
+        return
+    order = {nodeid: index for index, nodeid in enumerate(
+        parallel.prioritize([item.nodeid for item in items], stats))}
+    items.sort(key=lambda item: order[item.nodeid])
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item: pytest.Item, nextitem: Any) -> Generator:
+    """Замеры шагов теста от setup до teardown включительно."""
+    perf = instrumentation.current()
+    if perf is not None:
+        perf.start_test(item.nodeid)
+    yield
+    if perf is not None:
+        perf.finish_test(item.nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: pytest.Item, call: Any) -> Generator:
+    """Сохранение результата каждой фазы теста в item (rep_setup,
+    rep_call, rep_teardown) для фикстур."""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+
+# nodeid -> (outcome, длительность всех фаз) для истории прогонов
+_results: Dict[str, Tuple[str, float]] = {}
+# Идентификатор сессии в истории: задаётся tools.parallel, иначе свой
+_SESSION_ID = os.getenv('PYTEST_SESSION_ID') or uuid.uuid4().hex
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    outcome, duration = _results.get(report.nodeid, ('passed', 0.0))
+    if report.failed:
+        outcome = 'failed'
+    elif report.skipped and outcome == 'passed':
+        outcome = 'skipped'
+    _results[report.nodeid] = (outcome, duration + report.duration)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Сохранение длительностей тестов для планирования прогонов
+    (включается TEST_HISTORY=1, параллельный раннер включает сам)."""
+    if os.getenv('TEST_HISTORY', '0') == '1':
+        history.record(
+            [(nodeid, outcome, duration)
+             for nodeid, (outcome, duration) in _results.items()],
+            worker=os.getenv('PYTEST_WORKER_ID', ''),
+            session=_SESSION_ID,
+            retry=os.getenv('PYTEST_RETRY', '0') == '1',
+        )
+    perf = instrumentation.current()
+    if perf is not None and perf.tests:
+        report = perf.write(os.getenv('PERF_REPORT_DIR', '.cache/perf'),
+                            worker=os.getenv('PYTEST_WORKER_ID', ''),
+                            keep=int(os.getenv('PERF_REPORT_KEEP', '20')))
+        for nodeid, trend in report['trend'].items():
+            if trend['regression']:
+                print(f"\n🐢 {nodeid}: {trend['duration_s']}s "
+                      f"(было {trend['baseline_s']}s, "
+                      f"{trend['change']:+.0%})")
+
+
+def has_failed(item: pytest.Item) -> bool:
+    """Упал ли тест на этапе setup или call."""
+    return any(
+        getattr(item, f"rep_{when}", None) is not None
+        and getattr(item, f"rep_{when}").failed
+        for when in ('setup', 'call')
+    )
+
+
+def _launch_instrumented() -> WebDriver:
+    """Запуск Chrome с подсчётом команд WebDriver, если замеры включены."""
+    driver = launch_chrome()
+    perf = instrumentation.current()
+    return perf.instrument_driver(driver) if perf is not None else driver
+
+
+@pytest.fixture(scope='session')
+def browser_pool() -> Generator[BrowserPool, Any, None]:
+    """Фикстура пула браузеров на всю сессию."""
+    watchdog = None
+    if os.getenv('BROWSER_WATCHDOG', '1') != '0':
+        watchdog = MemoryWatchdog(
+            max_rss_mb=float(os.getenv('BROWSER_MAX_RSS_MB', '1500')),
+            unresponsive_s=float(os.getenv('BROWSER_UNRESPONSIVE_S', '10')),
+        )
+    pool = BrowserPool(
+        size=int(os.getenv('BROWSER_POOL_SIZE', '1')),
+        max_leases=int(os.getenv('BROWSER_MAX_LEASES', '20')),
+        factory=_launch_instrumented,
+        watchdog=watchdog,
+    )
+
+    yield pool
+
+    pool.close()
+    print(f"\n🧰 Пул браузеров:\n{pool.report()}")
+    if watchdog is not None:
+        print(f"\n🧠 Память браузеров:\n{watchdog.report()}")
+
+
+def _report_page_metrics(request: pytest.FixtureRequest,
+                         metrics: PageMetrics, profile: str) -> List[str]:
+    """Отчёт о загрузке страниц теста и история; возвращает нарушения
+    бюджетов."""
+    if not metrics.pages:
+        return []
+    marker = request.node.get_closest_marker('perf_budget')
+    budgets = dict(marker.kwargs) if marker else {}
+    baseline = page_metrics.baseline(
+        [page['url'] for page in metrics.pages], profile)
+    page_metrics.record(metrics.pages, profile, request.node.nodeid)
+    allure.attach(
+        metrics.report(budgets, baseline),
+        name="Page performance",
+        attachment_type=allure.attachment_type.JSON
+    )
+    violations = metrics.violations(budgets)
+    for violation in violations:
+        print(f"\n🚨 Бюджет: {violation}")
+    return violations
+
+
+def _report_browser_memory(request: pytest.FixtureRequest,
+                           watchdog: MemoryWatchdog, driver: WebDriver) -> None:
+    """Пик памяти браузера за тест в отчёт замеров."""
+    peak = watchdog.end(driver, request.node.nodeid)
+    if not peak:
+        return
+    perf = instrumentation.current()
+    if perf is not None:
+        perf.annotate(**peak)
+    print(f"\n🧠 Пик памяти браузера: {peak['peak_rss_mb']} MB")
+
+
+@pytest.fixture(scope='session')
+def offline_server() -> Generator[Optional[SnapshotServer], Any, None]:
+    """Фикстура локального сервера офлайн-снимков (OFFLINE_SNAPSHOTS)."""
+    path = os.getenv('OFFLINE_SNAPSHOTS')
+    if not path:
+        yield None
+        return
+    server = SnapshotServer(SnapshotStore(path))
+    server.run_in_thread()
+
+    yield server
+
+    server.stop()
+    print(f"\n🗄 {server.report()}")
+
+
+@pytest.fixture(scope='function')
+def browser(
+    request: pytest.FixtureRequest, browser_pool: BrowserPool,
+    offline_server: Optional[SnapshotServer]
+) -> Generator[WebDriver, Any, None]:
+    """Фикстура для получения браузера из пула с сетевым профилем теста."""
+    marker = request.node.get_closest_marker('network_profile')
+    profile = os.getenv('NETWORK_PROFILE', 'full')
+    options: dict = {}
+    if marker:
+        profile = marker.args[0] if marker.args else profile
+        options = dict(marker.kwargs)
+    if offline_server is not None:
+        # Без сети: всё, чего нет в снимках, блокируется
+        options['block'] = (*options.get('block', ()), 'https://*')
+
+    with browser_pool.lease() as driver:
+        network = NetworkPolicy(driver, profile, **options)
+        network.apply()
+        redirect = None
+        if offline_server is not None:
+            redirect = OfflineRedirect(driver, offline_server.base,
+                                       offline_server.hosts)
+            redirect.install()
+        watchdog = browser_pool.watchdog
+        if watchdog is not None:
+            watchdog.begin(driver)
+        metrics = None
+        if os.getenv('PAGE_METRICS', '1') != '0':
+            metrics = PageMetrics(driver)
+            metrics.install()
+
+        yield driver
+
+        violations: List[str] = []
+        try:
+            if metrics is not None:
+                metrics.release()
+                violations = _report_page_metrics(request, metrics, profile)
+        finally:
+            # Браузер возвращается в пул без перехватов и сетевых правил
+            # теста, даже если отчёт упал
+            if redirect is not None:
+                redirect.release()
+            if watchdog is not None:
+                _report_browser_memory(request, watchdog, driver)
+            timings = network.collect()
+            network.clear()
+        if timings:
+            summary = summarize(timings)
+            allure.attach(
+                json.dumps({'profile': profile, 'summary': summary,
+                            'requests': timings},
+                           ensure_ascii=False, indent=2),
+                name="Network timings",
+                attachment_type=allure.attachment_type.JSON
+            )
+            print(f"\n🌐 Сеть ({profile}): {summary}")
+
+    # Бюджеты проверяются последними, когда браузер уже вернулся в пул
+    if violations and os.getenv('PERF_BUDGET_MODE', 'warn') == 'fail':
+        pytest.fail("Превышены бюджеты страниц:\n" + "\n".join(violations))
+
+
+@pytest.fixture(scope='function')
+def waiter(browser: WebDriver) -> Generator[Waiter, Any, None]:
+    """Фикстура ожиданий с отчётом о затраченном времени."""
+    wait = Waiter(browser)
+
+    yield wait
+
+    if wait.results:
+        allure.attach(wait.report(), name="Waits")
+        print(f"\n⏱ Ожидания:\n{wait.report()}")
+
+
+@pytest.fixture(scope='session')
+def selector_cache() -> Generator[SelectorCache, Any, None]:
+    """Фикстура кэша сработавших селекторов."""
+    cache = SelectorCache(
+        os.getenv('SELECTOR_CACHE', '.cache/selectors.json'))
+
+    yield cache
+
+    cache.save()
+
+
+@pytest.fixture(scope='function')
+def probe(browser: WebDriver,
+          selector_cache: SelectorCache) -> SelectorProbe:
+    """Фикстура поиска элементов по списку селекторов."""
+    return SelectorProbe(browser, selector_cache)
+
+
+@pytest.fixture(scope='function')
+def page_assert(browser: WebDriver) -> Generator[PageAssert, Any, None]:
+    """Фикстура проверок внутри страницы со счётчиком переданных данных."""
+    checks = PageAssert(browser)
+
+    yield checks
+
+    if checks.calls:
+        allure.attach(checks.report(), name="In-page checks")
+        print(f"\n📦 {checks.report()}")
+
+
+@pytest.fixture(scope='session')
+def screenshot_service() -> Generator[ScreenshotService, Any, None]:
+    """Фикстура фоновой обработки скриншотов."""
+    service = ScreenshotService(
+        mode=os.getenv('SCREENSHOT_MODE', 'failure'),
+        ring_size=int(os.getenv('SCREENSHOT_RING_SIZE', '5')),
+        max_width=int(os.getenv('SCREENSHOT_MAX_WIDTH', '960')),
+    )
+
+    yield service
+
+    service.close()
+    print(f"\n📸 Скриншоты: {service.report()}")
+
+
+@pytest.fixture(scope='function')
+def screenshots(
+    request: pytest.FixtureRequest,
+    browser: WebDriver,
+    screenshot_service: ScreenshotService,
+) -> Generator[ScreenshotRecorder, Any, None]:
+    """Фикстура скриншотов теста; при падении добавляется финальный кадр."""
+    shots = screenshot_service.for_test()
+
+    yield shots
+
+    failed = has_failed(request.node)
+    if failed:
+        shots.capture(browser, "failure", final=True)
+    shots.finish(failed)
+
+
+@pytest.fixture(scope='session')
+def visual_baselines() -> Generator[VisualBaselines, Any, None]:
+    """Фикстура эталонных скриншотов для визуальных проверок."""
+    baselines = VisualBaselines(
+        os.getenv('VISUAL_BASELINE_DIR', '.cache/visual'),
+        method=os.getenv('VISUAL_METHOD', 'pixel'),
+        max_diff_ratio=float(os.getenv('VISUAL_MAX_DIFF', '0.01')),
+        min_ssim=float(os.getenv('VISUAL_MIN_SSIM', '0.98')),
+        update=os.getenv('VISUAL_UPDATE', '0') == '1',
+    )
+
+    yield baselines
+
+    baselines.close()
+    print(f"\n🖼 Визуальные проверки: {baselines.report()}")
+
+
+@pytest.fixture(scope='function')
+def visual(
+    visual_baselines: VisualBaselines
+) -> Generator[VisualCheck, Any, None]:
+    """Фикстура визуальных проверок теста с картами отличий в Allure."""
+    check = visual_baselines.for_test()
+
+    yield check
+
+    failed = [result for result in check.finish() if result.failed]
+    for result in failed:
+        print(f"\n🖼 {result}")
+    if failed and os.getenv('VISUAL_MODE', 'warn') == 'fail':
+        pytest.fail("Визуальные отличия от эталона:\n"
+                    + "\n".join(str(result) for result in failed))
+
+
+@pytest.fixture(scope='session')
+def state_store() -> Generator[StateStore, Any, None]:
+    """Фикстура снимка cookies и storage после согласия с cookies."""
+    store = StateStore(
+        os.getenv('STATE_SNAPSHOT', '.cache/session_state.json'),
+        max_age=float(os.getenv('STATE_MAX_AGE', '43200')),
+    )
+
+    yield store
+
+    print(f"\n🍪 {store.report()}")
+
+
+@pytest.fixture(scope='function')
+def state(browser: WebDriver,
+          state_store: StateStore) -> Generator[SessionState, Any, None]:
+    """Фикстура восстановления состояния до первого перехода теста."""
+    session_state = SessionState(state_store, browser)
+    session_state.restore()
+
+    yield session_state
+
+    session_state.release()
+
+
+@pytest.fixture(scope='session')
+def checkpoint_store() -> Generator[CheckpointStore, Any, None]:
+    """Фикстура снимков общих начал тестов, одна на воркер."""
+    store = CheckpointStore()
+
+    yield store
+
+    print(f"\n⏩ Снимки начал тестов:\n{store.report()}")
+
+
+@pytest.fixture(scope='function')
+def checkpoints(
+    browser: WebDriver, waiter: Waiter, checkpoint_store: CheckpointStore
+) -> Generator[FlowCheckpoints, Any, None]:
+    """Фикстура выполнения или восстановления начала теста."""
+    flow = FlowCheckpoints(checkpoint_store, browser, waiter)
+
+    yield flow
+
+    flow.release()
+    if flow.restored:
+        allure.attach(checkpoint_store.report(), name="Checkpoints")
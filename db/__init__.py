@@ -0,0 +1 @@
+"""Хелперы для работы с локальными БД (история прогонов и т.д.)."""
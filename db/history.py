@@ -0,0 +1,149 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+
+DEFAULT_PATH = os.getenv('TEST_HISTORY_DB', '.cache/history.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    nodeid TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS results_nodeid ON results (nodeid, finished_at);
+"""
+
+# Колонки, добавленные после первой версии схемы
+_COLUMNS = {
+    'session': "TEXT NOT NULL DEFAULT ''",
+    'retry': "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def connect(path: str = DEFAULT_PATH) -> sqlite3.Connection:
+    """Подключение к БД истории прогонов (WAL, общий доступ воркеров)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    for column, definition in _COLUMNS.items():
+        if column not in existing:
+            conn.execute(
+                f"ALTER TABLE results ADD COLUMN {column} {definition}")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS results_session ON results (session)")
+    return conn
+
+
+@contextmanager
+def transaction(path: str = DEFAULT_PATH) -> Iterator[sqlite3.Connection]:
+    """Подключение на время одной транзакции: commit (или rollback при
+    ошибке) и закрытие соединения."""
+    conn = connect(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def record(results: Iterable[Tuple[str, str, float]],
+           worker: str = '', session: str = '', retry: bool = False,
+           path: str = DEFAULT_PATH) -> None:
+    """Сохранение результатов (nodeid, outcome, duration) одним батчем.
+
+    ``retry`` помечает повторный запуск карантина: такие строки не
+    учитываются в stats().
+    """
+    now = time.time()
+    rows = [(nodeid, outcome, duration, now, worker, session, int(retry))
+            for nodeid, outcome, duration in results]
+    if not rows:
+        return
+    with transaction(path) as conn:
+        conn.executemany(
+            "INSERT INTO results (nodeid, outcome, duration, finished_at, "
+            "worker, session, retry) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def durations(last: int = 5, path: str = DEFAULT_PATH) -> Dict[str, float]:
+    """Средняя длительность каждого теста по последним ``last`` прогонам.
+
+    Пропущенные тесты и повторы карантина не учитываются: их время не
+    отражает обычный прогон.
+    """
+    if not os.path.exists(path):
+        return {}
+    with transaction(path) as conn:
+        rows = conn.execute(
+            """
+            SELECT nodeid, AVG(duration) FROM (
+                SELECT nodeid, duration, ROW_NUMBER() OVER (
+                    PARTITION BY nodeid ORDER BY finished_at DESC) AS n
+                FROM results
+                WHERE outcome IN ('passed', 'failed') AND retry = 0
+            ) WHERE n <= ? GROUP BY nodeid
+            """,
+            (last,)
+        ).fetchall()
+    return {nodeid: duration for nodeid, duration in rows}
+
+
+def stats(last: int = 10,
+          path: str = DEFAULT_PATH) -> Dict[str, Dict[str, Any]]:
+    """Статистика по последним ``last`` запускам каждого теста: число
+    запусков и падений, смены результата (flips), средняя длительность и
+    результат последнего запуска. Пропуски и повторы карантина не
+    учитываются."""
+    if not os.path.exists(path):
+        return {}
+    with transaction(path) as conn:
+        rows = conn.execute(
+            """
+            SELECT nodeid, outcome, duration FROM (
+                SELECT nodeid, outcome, duration, ROW_NUMBER() OVER (
+                    PARTITION BY nodeid ORDER BY finished_at DESC) AS n
+                FROM results WHERE outcome != 'skipped' AND retry = 0
+            ) WHERE n <= ? ORDER BY nodeid, n DESC
+            """,
+            (last,)
+        ).fetchall()
+    result: Dict[str, Dict[str, Any]] = {}
+    for nodeid, outcome, duration in rows:
+        item = result.setdefault(nodeid, {
+            'runs': 0, 'failures': 0, 'flips': 0, 'duration': 0.0,
+            'last': None})
+        if item['last'] is not None and item['last'] != outcome:
+            item['flips'] += 1
+        item['runs'] += 1
+        item['failures'] += outcome == 'failed'
+        item['duration'] += duration
+        item['last'] = outcome
+    for item in result.values():
+        item['duration'] /= item['runs']
+    return result
+
+
+def session_outcomes(nodeids: Sequence[str], session: str,
+                     path: str = DEFAULT_PATH) -> Dict[str, str]:
+    """Результаты тестов, записанные сессией pytest ``session``.
+
+    Тестов, по которым сессия ничего не записала (например, процесс
+    упал до sessionfinish), в ответе нет.
+    """
+    if not os.path.exists(path):
+        return {}
+    with transaction(path) as conn:
+        rows = conn.execute(
+            "SELECT nodeid, outcome FROM results WHERE session = ?",
+            (session,)
+        ).fetchall()
+    wanted = set(nodeids)
+    return {nodeid: outcome for nodeid, outcome in rows if nodeid in wanted}
@@ -0,0 +1,61 @@
+import time
+from typing import Any, Dict, Iterable, Mapping
+
+from db import history
+
+# Метрики страницы; для каждой можно задать бюджет (верхнюю границу)
+METRICS = ('ttfb_ms', 'fcp_ms', 'lcp_ms', 'cls', 'dom_content_loaded_ms',
+           'load_ms', 'requests', 'transfer_bytes')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_metrics (
+    url TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    nodeid TEXT,
+    finished_at REAL NOT NULL,
+    %s
+);
+CREATE INDEX IF NOT EXISTS page_metrics_url
+    ON page_metrics (url, profile, finished_at);
+""" % ',\n    '.join(f"{metric} REAL" for metric in METRICS)
+
+
+def record(pages: Iterable[Mapping[str, Any]], profile: str,
+           nodeid: str = '', path: str = history.DEFAULT_PATH) -> None:
+    """Сохранение метрик страниц теста одним батчем."""
+    now = time.time()
+    rows = [(page['url'], profile, nodeid, now,
+             *(page.get(metric) for metric in METRICS))
+            for page in pages]
+    if not rows:
+        return
+    placeholders = ', '.join('?' * (4 + len(METRICS)))
+    with history.transaction(path) as conn:
+        conn.executescript(_SCHEMA)
+        conn.executemany(
+            f"INSERT INTO page_metrics VALUES ({placeholders})", rows)
+
+
+def baseline(urls: Iterable[str], profile: str, last: int = 5,
+             path: str = history.DEFAULT_PATH) -> Dict[str, Dict[str, float]]:
+    """Средние метрики страниц по последним ``last`` замерам."""
+    averages = ', '.join(f"AVG({metric})" for metric in METRICS)
+    result: Dict[str, Dict[str, float]] = {}
+    with history.transaction(path) as conn:
+        conn.executescript(_SCHEMA)
+        for url in set(urls):
+            row = conn.execute(
+                f"""
+                SELECT COUNT(*), {averages} FROM (
+                    SELECT * FROM page_metrics
+                    WHERE url = ? AND profile = ?
+                    ORDER BY finished_at DESC LIMIT ?
+                )
+                """,
+                (url, profile, last)
+            ).fetchone()
+            if row[0]:
+                result[url] = {metric: round(value, 4)
+                               for metric, value in zip(METRICS, row[1:])
+                               if value is not None}
+    return result
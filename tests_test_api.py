@@ -1,24 +1,38 @@
+import asyncio
+import json
 import pytest
-import requests
 import os
 import allure
 from dotenv import load_dotenv
 
+from api.async_client import AsyncApiClient
+from api.client import create_session, session_report
+from api.columnar import CatalogSnapshot
+from api.paginator import Paginator
+from api.requests_spec import api_request
+from tools import instrumentation
+from tools.bench import benchmark
+
 load_dotenv()
 
 # Получаем API ключ из переменных окружения
 API_KEY = os.getenv('KINOPOISK_API_KEY', 'GGTYBTW-0VB4NX1-G4REM52-0Y8V7Y6')
+# Адрес API; для локальной замены - http://127.0.0.1:8765 (api.stub_server)
+API_URL = os.getenv('KINOPOISK_API_URL', 'https://api.kinopoisk.dev').rstrip('/')
 
 
 @pytest.fixture(scope='session')
 def api_client():
     """Фикстура для API клиента с правильными заголовками"""
-    session = requests.Session()
-    session.headers.update({
-        "X-API-KEY": API_KEY,
-        "accept": "application/json"
-    })
-    return session
+    session = create_session(API_KEY)
+    perf = instrumentation.current()
+    if perf is not None:
+        perf.instrument_session(session)
+    yield session
+    report = session_report(session)
+    if report:
+        print(f"\n📊 {report}")
+    session.close()
 
 
 @allure.feature("API Tests")
@@ -27,10 +41,8 @@ def api_client():
 def test_api_key_valid(api_client):
     """Тест проверки валидности API ключа"""
     with allure.step("Отправка запроса для проверки API ключа"):
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie",
-            params={"limit": 1}
-        )
+        path, params = api_request('key_valid')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     allure.attach(
         f"Status Code: {response.status_code}", name="Response Status")
@@ -56,10 +68,8 @@ def test_api_search_school(api_client):
     with allure.step("Выполнение поиска 'Школа'"):
         print("🔍 Ищем Школу...")
 
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie/search",
-            params={"query": "Школа", "limit": 10}
-        )
+        path, params = api_request('search')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     allure.attach(f"Status: {response.status_code}", name="Search Status")
     print(f"Status: {response.status_code}")
@@ -100,15 +110,8 @@ def test_api_high_rated_movies(api_client):
     with allure.step("Поиск фильмов с высоким рейтингом"):
         print("⭐ Ищем фильмы с высоким рейтингом...")
 
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie",
-            params={
-                "rating.kp": "8-10",
-                "sortField": "rating.kp",
-                "sortType": "-1",
-                "limit": 5
-            }
-        )
+        path, params = api_request('high_rated')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     with allure.step("Проверка успешности запроса"):
         assert response.status_code == 200
@@ -119,15 +122,15 @@ def test_api_high_rated_movies(api_client):
     with allure.step("Проверка наличия результатов"):
         assert len(movies) > 0, "Не найдено фильмов с высоким рейтингом"
 
-    # Проверяем рейтинг
-    movie_ratings = []
-    for movie in movies:
-        rating = movie.get('rating', {}).get('kp', 0)
-        movie_ratings.append(f"{movie.get('name')}: {rating}")
-        with allure.step(f"Проверка рейтинга фильма {movie.get('name')}"):
-            assert rating >= 8.0, f"Фильм {movie.get('name')} имеет рейтинг {rating} < 8.0"
+    # Проверяем рейтинг всех фильмов одной векторной проверкой
+    snapshot = CatalogSnapshot.from_docs(movies)
+    result = snapshot.check("rating.kp >= 8.0", lambda s: s.rating_kp >= 8.0)
+    allure.attach(snapshot.summary([result]), name="Rating check",
+                  attachment_type=allure.attachment_type.JSON)
+
+    with allure.step("Проверка рейтинга фильмов"):
+        assert result.ok, f"Фильмы с рейтингом < 8.0: {snapshot.rows(result.violations)}"
 
-    allure.attach("\n".join(movie_ratings), name="Movies with ratings ≥ 8.0")
     print(f"✅ Найдено {len(movies)} фильмов с рейтингом ≥ 8.0")
 
 
@@ -139,10 +142,8 @@ def test_api_movies_by_year(api_client):
     with allure.step("Поиск фильмов 2023 года"):
         print("📅 Ищем фильмы 2023 года...")
 
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie",
-            params={"year": "2023", "limit": 5}
-        )
+        path, params = api_request('by_year')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     with allure.step("Проверка успешности запроса"):
         assert response.status_code == 200
@@ -153,17 +154,50 @@ def test_api_movies_by_year(api_client):
     with allure.step("Проверка наличия результатов"):
         assert len(movies) > 0, "Не найдено фильмов 2023 года"
 
-    # Проверяем год
-    movie_list = []
-    for movie in movies:
-        movie_list.append(f"{movie.get('name')} ({movie.get('year')})")
-        with allure.step(f"Проверка года выпуска {movie.get('name')}"):
-            assert movie.get('year') == 2023, f"Фильм {movie.get('name')} не 2023 года"
+    # Проверяем год всех фильмов одной векторной проверкой
+    snapshot = CatalogSnapshot.from_docs(movies)
+    result = snapshot.check("year == 2023", lambda s: s.year == 2023)
+    allure.attach(snapshot.summary([result]), name="Year check",
+                  attachment_type=allure.attachment_type.JSON)
+
+    with allure.step("Проверка года выпуска фильмов"):
+        assert result.ok, f"Фильмы не 2023 года: {snapshot.rows(result.violations)}"
 
-    allure.attach("\n".join(movie_list), name="Movies from 2023")
     print(f"✅ Найдено {len(movies)} фильмов 2023 года")
 
 
+@allure.feature("API Tests")
+@allure.title("Параллельный поиск фильмов по годам")
+@allure.description("Тест проверяет фильмы за несколько лет одновременными "
+                    "запросами")
+def test_api_movies_by_year_sweep():
+    """Тест фильмов по годам через асинхронный клиент"""
+    years = range(2019, 2024)
+
+    async def sweep():
+        async with AsyncApiClient(API_KEY, API_URL) as client:
+            return await client.gather(
+                api_request('by_year', year=year) for year in years
+            )
+
+    with allure.step("Одновременные запросы за 2019-2023 годы"):
+        print("📅 Ищем фильмы за 2019-2023 годы...")
+        responses = asyncio.run(sweep())
+
+    for year, response in zip(years, responses):
+        with allure.step(f"Проверка фильмов {year} года"):
+            assert response.status_code == 200, f"Ошибка запроса: {response.status_code}"
+            movies = response.json().get('docs', [])
+            assert len(movies) > 0, f"Не найдено фильмов {year} года"
+            for movie in movies:
+                assert movie.get('year') == year, f"Фильм {movie.get('name')} не {year} года"
+
+    timings = [f"{year}: {response.elapsed:.2f}s"
+               for year, response in zip(years, responses)]
+    allure.attach("\n".join(timings), name="Request timings")
+    print(f"✅ Проверено {len(responses)} лет")
+
+
 @allure.feature("API Tests")
 @allure.title("Получение детальной информации о фильме")
 @allure.description("Тест проверяет получение детальной информации по ID фильма")
@@ -172,10 +206,8 @@ def test_api_movie_details(api_client):
     with allure.step("Получение детальной информации о фильме"):
         print("🎬 Получаем детальную информацию о фильме...")
 
-        # Используем правильный API endpoint и ID фильма "Школа"
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie/493098"  # ID фильма "Школа"
-        )
+        path, params = api_request('details')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     with allure.step("Проверка успешности запроса"):
         assert response.status_code == 200, f"Ошибка запроса: {response.status_code}"
@@ -206,10 +238,8 @@ def test_api_pagination(api_client):
     with allure.step("Тестирование пагинации"):
         print("📄 Тестируем пагинацию...")
 
-        response = api_client.get(
-            "https://api.kinopoisk.dev/v1.4/movie",
-            params={"page": 1, "limit": 2}
-        )
+        path, params = api_request('pagination')
+        response = api_client.get(f"{API_URL}{path}", params=params)
 
     with allure.step("Проверка успешности запроса"):
         assert response.status_code == 200
@@ -229,5 +259,84 @@ def test_api_pagination(api_client):
     print("✅ Пагинация работает")
 
 
+@allure.feature("API Tests")
+@allure.title("Проверка всей отфильтрованной выдачи")
+@allure.description("Тест обходит все страницы выдачи и проверяет фильтр "
+                    "и отсутствие повторов ID")
+@pytest.mark.parametrize("params, check", [
+    ({"rating.kp": "8-10"}, lambda s: s.rating_kp >= 8.0),
+    ({"year": "2023"}, lambda s: s.year == 2023),
+], ids=["rating_8_plus", "year_2023"])
+@pytest.mark.skipif(not os.getenv('API_SCAN'),
+                    reason="Обход выдачи включается переменной API_SCAN")
+def test_api_catalog_invariants(api_client, params, check):
+    """Тест инвариантов по всем страницам выдачи"""
+    # 0 - обход всей выдачи
+    max_pages = int(os.getenv('API_SCAN_MAX_PAGES', '5'))
+    paginator = Paginator(
+        api_client,
+        f"{API_URL}/v1.4/movie",
+        params=params,
+        limit=int(os.getenv('API_SCAN_LIMIT', '250')),
+        max_pages=max_pages or None,
+        checkpoint=f".cache/scan_{'_'.join(params.values())}.json",
+        fields=("name", "year", "rating.kp", "votes.kp", "type"),
+    )
+
+    with allure.step(f"Обход выдачи {params}"):
+        print(f"📚 Обходим выдачу {params}...")
+        snapshot = CatalogSnapshot.from_docs(paginator)
+        if os.getenv('API_SNAPSHOT_DIR'):
+            snapshot.save(os.path.join(os.getenv('API_SNAPSHOT_DIR'),
+                                       '_'.join(params.values())))
+
+    allure.attach(paginator.report(), name="Scan speed")
+    print(f"✅ {paginator.report()}")
+
+    with allure.step("Проверка результатов обхода"):
+        result = snapshot.check(f"filter {params}", check)
+        duplicates = snapshot.duplicate_ids()
+        allure.attach(snapshot.summary([result]), name="Invariants",
+                      attachment_type=allure.attachment_type.JSON)
+        print(result)
+
+        assert len(snapshot) > 0, f"Пустая выдача для {params}"
+        assert result.ok, f"Фильмы не проходят фильтр: {snapshot.rows(result.violations, 20)}"
+        assert len(duplicates) == 0, f"Повторы ID между страницами: {duplicates[:20].tolist()}"
+
+
+@allure.feature("API Tests")
+@allure.title("Нагрузочный прогон сценариев API")
+@allure.description("Запросы API-тестов воспроизводятся под нагрузкой, "
+                    "отчёт с p50/p95/p99 прикладывается к тесту")
+@pytest.mark.skipif(not os.getenv('API_BENCH_DURATION'),
+                    reason="Нагрузочный прогон включается API_BENCH_DURATION")
+def test_api_benchmark():
+    """Нагрузочный прогон сценариев API"""
+    with allure.step("Нагрузочный прогон"):
+        report = asyncio.run(benchmark(
+            API_URL,
+            API_KEY,
+            duration=float(os.getenv('API_BENCH_DURATION')),
+            concurrency=int(os.getenv('API_BENCH_CONCURRENCY', '20')),
+            mode=os.getenv('API_BENCH_MODE', 'closed'),
+            rate=float(os.getenv('API_BENCH_RATE', '100')),
+        ))
+
+    allure.attach(json.dumps(report, ensure_ascii=False, indent=2),
+                  name="Benchmark report",
+                  attachment_type=allure.attachment_type.JSON)
+    total = report['total']
+    print(f"✅ {total['requests']} запросов, {total['throughput_rps']} rps, "
+          f"p95 {total['p95_ms']} ms, ошибки {total['errors']}")
+
+    with allure.step("Проверка доли ошибок"):
+        errors = sum(total['errors'].values())
+        assert total['requests'] > 0, "Не выполнено ни одного запроса"
+        assert errors / total['requests'] <= float(
+            os.getenv('API_BENCH_MAX_ERROR_RATE', '0.01')
+        ), f"Слишком много ошибок: {total['errors']}"
+
+
 if __name__ == "__main__":
-    pytest.main(['-v', '-s', '--alluredir=allure-results'])
\ No newline at end of file
+    pytest.main(['-v', '-s', '--alluredir=allure-results'])
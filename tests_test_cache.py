@@ -0,0 +1,128 @@
+import json
+
+import allure
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api.cache import CacheAdapter
+from api.cassette import build_response
+
+API = "http://kinopoisk.test/v1.4"
+
+
+class OriginAdapter(BaseAdapter):
+    """Транспорт-источник: тело по URL, ETag и ответ 304 на If-None-Match."""
+
+    def __init__(self, size: int = 100) -> None:
+        super().__init__()
+        self.size = size
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request.url)
+        etag = f'"{len(request.url)}"'
+        if request.headers.get('If-None-Match') == etag:
+            return build_response(request, 304, 'Not Modified', '{}', b'')
+        return build_response(request, 200, 'OK', json.dumps({'ETag': etag}),
+                              request.url.encode('utf-8').ljust(self.size))
+
+    def close(self) -> None:
+        pass
+
+
+class Clock:
+    """Управляемое время для TTL и порядка вытеснения."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("api.cache.time.time", clock)
+    return clock
+
+
+@pytest.fixture
+def origin():
+    return OriginAdapter()
+
+
+def cached_session(tmp_path, origin, **kwargs):
+    adapter = CacheAdapter(str(tmp_path / "cache.sqlite"), inner=origin,
+                           **kwargs)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.headers["X-API-KEY"] = "offline"
+    return session, adapter
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Ответ из кэша до истечения TTL")
+def test_cache_serves_fresh_response(tmp_path, clock, origin):
+    """Повторный запрос в пределах TTL не уходит к источнику"""
+    session, adapter = cached_session(tmp_path, origin)
+
+    first = session.get(f"{API}/movie", params={"page": 1})
+    clock.now += 599
+    second = session.get(f"{API}/movie", params={"page": 1})
+
+    assert second.content == first.content
+    assert len(origin.sent) == 1
+    assert adapter.hits == 1
+    adapter.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Перепроверка по ETag после истечения TTL")
+def test_cache_revalidates_expired_response(tmp_path, clock, origin):
+    """Устаревший ответ перепроверяется через If-None-Match, 304 продлевает"""
+    session, adapter = cached_session(tmp_path, origin)
+
+    first = session.get(f"{API}/movie", params={"page": 1})
+    clock.now += 601
+    second = session.get(f"{API}/movie", params={"page": 1})
+    third = session.get(f"{API}/movie", params={"page": 1})
+
+    assert second.status_code == third.status_code == 200
+    assert second.content == third.content == first.content
+    assert len(origin.sent) == 2
+    assert (adapter.hits, adapter.revalidated, adapter.misses) == (1, 1, 1)
+    adapter.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("TTL по эндпоинтам")
+def test_cache_ttl_by_endpoint(tmp_path, origin):
+    """Карточка фильма живёт сутки, поиск - час, прочие пути не кэшируются"""
+    _, adapter = cached_session(tmp_path, origin)
+
+    assert adapter.ttl_for(f"{API}/movie/493098") == 86400
+    assert adapter.ttl_for(f"{API}/movie/search?query=x") == 3600
+    assert adapter.ttl_for(f"{API}/movie/") == 600
+    assert adapter.ttl_for(f"{API}/person") == 0
+    adapter.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Вытеснение давно не читавшихся ответов")
+def test_cache_evicts_least_recently_used(tmp_path, clock, origin):
+    """При превышении лимита удаляется запись, которую дольше всех не читали"""
+    session, adapter = cached_session(tmp_path, origin, max_bytes=250)
+
+    session.get(f"{API}/movie/1")
+    session.get(f"{API}/movie/2")
+    session.get(f"{API}/movie/1")
+    session.get(f"{API}/movie/3")
+    session.get(f"{API}/movie/1")
+    session.get(f"{API}/movie/2")
+
+    assert origin.sent == [f"{API}/movie/1", f"{API}/movie/2",
+                           f"{API}/movie/3", f"{API}/movie/2"]
+    adapter.close()
@@ -0,0 +1,76 @@
+import json
+
+import allure
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api.cassette import (CassetteAdapter, CassetteMiss, CassetteStore,
+                          build_response)
+from api.projection import DocsStream
+
+URL = "http://kinopoisk.test/v1.4/movie"
+BODY = json.dumps({"docs": [{"id": 1, "name": "Школа"}], "pages": 1},
+                  ensure_ascii=False).encode('utf-8')
+
+
+class FixedAdapter(BaseAdapter):
+    """Транспорт, который всегда отдаёт один и тот же ответ."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        return build_response(request, 200, 'OK',
+                              '{"Content-Type": "application/json"}', BODY)
+
+    def close(self) -> None:
+        pass
+
+
+def session_with(adapter: BaseAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount('http://', adapter)
+    return session
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CassetteStore(str(tmp_path / "cassettes.sqlite"))
+    yield store
+    store.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Потоковое чтение ответа из кассеты")
+def test_cassette_replay_streams_body(store):
+    """Воспроизведённый ответ читается через iter_content и iter_lines"""
+    recorder = CassetteAdapter(store, mode='record', inner=FixedAdapter())
+    session_with(recorder).get(URL, params={"page": 1})
+
+    network = FixedAdapter()
+    session = session_with(CassetteAdapter(store, mode='replay',
+                                           inner=network))
+    response = session.get(URL, params={"page": 1}, stream=True)
+
+    assert b''.join(response.iter_content(chunk_size=3)) == BODY
+    assert list(session.get(URL, params={"page": 1}).iter_lines()) == [BODY]
+    stream = DocsStream(session.get(URL, params={"page": 1}, stream=True),
+                        chunk_size=5)
+    assert list(stream) == [{"id": 1, "name": "Школа"}]
+    assert network.sent == 0
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Промах кассеты в режиме replay")
+def test_cassette_replay_miss(store):
+    """Без записи в режиме replay запрос не уходит в сеть"""
+    network = FixedAdapter()
+    session = session_with(CassetteAdapter(store, mode='replay',
+                                           inner=network))
+
+    with pytest.raises(CassetteMiss):
+        session.get(URL, params={"page": 2})
+    assert network.sent == 0
@@ -0,0 +1,77 @@
+import json
+
+import allure
+import pytest
+import requests
+
+from api.paginator import Paginator
+from api.stub_server import Catalog, StubServer
+
+MOVIES = 300
+LIMIT = 50
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = StubServer(Catalog(MOVIES, seed=1))
+    base_url = server.run_in_thread()
+    yield f"{base_url}/v1.4/movie"
+    server.stop()
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.headers["X-API-KEY"] = "offline"
+    yield session
+    session.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Обход всех страниц выдачи")
+def test_paginator_reads_all_pages(stub_url, session):
+    """Все документы по одному разу, число страниц из ответа"""
+    paginator = Paginator(session, stub_url, limit=LIMIT, fields=("name",))
+    ids = [doc["id"] for doc in paginator]
+
+    assert len(ids) == MOVIES
+    assert len(set(ids)) == MOVIES
+    assert paginator.pages == paginator.total_pages == MOVIES // LIMIT
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Продолжение обхода с контрольной точки")
+def test_paginator_resumes_from_checkpoint(stub_url, session, tmp_path):
+    """После обрыва на третьей странице обход продолжается с неё"""
+    checkpoint = str(tmp_path / "scan.json")
+    full = [doc["id"] for doc in Paginator(session, stub_url, limit=LIMIT)]
+
+    interrupted = iter(Paginator(session, stub_url, limit=LIMIT,
+                                 checkpoint=checkpoint))
+    for _ in range(2 * LIMIT + 10):
+        next(interrupted)
+    interrupted.close()
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f)["next_page"] == 3
+
+    resumed = Paginator(session, stub_url, limit=LIMIT, checkpoint=checkpoint)
+    ids = [doc["id"] for doc in resumed]
+
+    assert ids == full[2 * LIMIT:]
+    assert resumed.start_page == 3
+    assert not (tmp_path / "scan.json").exists()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Контрольная точка другого запроса не используется")
+def test_paginator_ignores_foreign_checkpoint(stub_url, session, tmp_path):
+    """Точка сохранена для других параметров - обход с первой страницы"""
+    checkpoint = tmp_path / "scan.json"
+    checkpoint.write_text(json.dumps({"key": "другой запрос",
+                                      "next_page": 4}), encoding="utf-8")
+
+    paginator = Paginator(session, stub_url, limit=LIMIT, max_pages=1,
+                          checkpoint=str(checkpoint))
+
+    assert len(list(paginator)) == LIMIT
+    assert paginator.start_page == 1
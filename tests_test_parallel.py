@@ -0,0 +1,90 @@
+import subprocess
+
+import allure
+import pytest
+
+from tools.parallel import (collect, failure_risk, is_flaky, prioritize,
+                            schedule)
+
+
+def stat(runs, failures=0, flips=0, last="passed", duration=1.0):
+    return {"runs": runs, "failures": failures, "flips": flips,
+            "last": last, "duration": duration}
+
+
+@allure.feature("Test Runner")
+@allure.title("Балансировка воркеров по длительности")
+def test_schedule_balances_shards():
+    """LPT: загрузка самого занятого воркера не больше 4/3 оптимума"""
+    known = {f"t::{i}": float(duration) for i, duration in
+             enumerate([9, 8, 7, 6, 5, 4, 3, 2, 1, 1, 1, 1])}
+
+    shards = schedule(list(known), 3, known)
+    loads = [sum(known[nodeid] for nodeid in shard) for shard in shards]
+
+    assert sorted(n for shard in shards for n in shard) == sorted(known)
+    assert max(loads) <= sum(known.values()) / 3 * 4 / 3
+    assert max(loads) - min(loads) <= max(known.values())
+
+
+@allure.feature("Test Runner")
+@allure.title("Тесты без истории и лишние воркеры")
+def test_schedule_unknown_tests_and_idle_workers():
+    """Новый тест получает медиану, пустых шардов нет"""
+    known = {"a::slow": 10.0, "a::mid": 2.0, "a::fast": 1.0}
+
+    shards = schedule(["a::slow", "a::new", "a::fast"], 5, known)
+
+    assert len(shards) == 3
+    assert shards[0] == ["a::slow"]
+    assert schedule([], 4, known) == []
+
+
+@allure.feature("Test Runner")
+@allure.title("Порядок по вероятности падения на секунду работы")
+def test_prioritize_by_risk_per_second():
+    """Недавно упавший быстрый тест идёт первым, стабильный долгий - последним"""
+    stats = {
+        "t::stable_slow": stat(20, duration=30.0),
+        "t::stable_fast": stat(20, duration=1.0),
+        "t::failed_fast": stat(20, failures=5, last="failed", duration=1.0),
+    }
+
+    order = prioritize(["t::stable_slow", "t::new", "t::stable_fast",
+                        "t::failed_fast"], stats)
+
+    assert order[0] == "t::failed_fast"
+    assert order[1] == "t::new"
+    assert order[-1] == "t::stable_slow"
+
+
+@allure.feature("Test Runner")
+@allure.title("Оценка риска и нестабильности")
+def test_failure_risk_and_flaky():
+    """Сглаживание Лапласа, надбавка за последнее падение, доля смен"""
+    assert failure_risk(None) == 0.5
+    assert failure_risk(stat(8)) == pytest.approx(0.1)
+    assert failure_risk(stat(8, failures=8, last="failed")) == 1.0
+    assert not is_flaky(None)
+    assert not is_flaky(stat(3, flips=2))
+    assert is_flaky(stat(10, flips=3))
+    assert not is_flaky(stat(10, flips=2))
+
+
+@allure.feature("Test Runner")
+@allure.title("Сбор тестов и ошибка сбора")
+def test_collect(tmp_path):
+    """nodeid собираются с фильтром -k, ошибка импорта не глотается"""
+    good = tmp_path / "test_good.py"
+    good.write_text("def test_one():\n    pass\n\n"
+                    "def test_two():\n    pass\n", encoding="utf-8")
+    broken = tmp_path / "test_broken.py"
+    broken.write_text("import missing_module_for_collect\n",
+                      encoding="utf-8")
+
+    nodeids = collect([str(good), "-p", "no:cacheprovider"], keyword="two")
+
+    assert [nodeid.split("::")[-1] for nodeid in nodeids] == ["test_two"]
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        collect([str(broken), "-p", "no:cacheprovider"])
+    assert "missing_module_for_collect" in error.value.stdout
@@ -0,0 +1,67 @@
+import json
+
+import allure
+import pytest
+
+from api.projection import DocsStream, select_fields
+
+DOCS = [
+    {"id": 1, "name": "Школа", "year": 2010, "rating": {"kp": 7.25}},
+    {"id": 2, "name": "Кавычка \" и \\ слэш\nи é 😀", "rating": {"kp": 10.0}},
+    {"id": 3, "name": None, "rating": {"kp": 8.125e-1}, "top": True},
+    2.5, 3, -1e10, 0.001,
+]
+META = {"total": 3, "limit": 250, "page": 1, "pages": 7}
+
+
+class ChunkedResponse:
+    """Ответ, отдающий тело кусками фиксированного размера."""
+
+    def __init__(self, body: bytes, size: int) -> None:
+        self.body = body
+        self.size = size
+        self.closed = False
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), self.size):
+            yield self.body[i:i + self.size]
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def body(ascii_only: bool) -> bytes:
+    return json.dumps({"docs": DOCS, **META},
+                      ensure_ascii=ascii_only).encode('utf-8')
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Потоковый разбор docs на границах чанков")
+@pytest.mark.parametrize("ascii_only", [False, True], ids=["utf8", "escaped"])
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, 33, 35, 64])
+def test_docs_stream_chunk_boundaries(size, ascii_only):
+    """Числа, строки и escape-последовательности, разрезанные чанками"""
+    response = ChunkedResponse(body(ascii_only), size)
+    stream = DocsStream(response)
+
+    assert list(stream) == DOCS
+    assert stream.meta == META
+    assert response.closed
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Ошибка на оборванном числе в конце ответа")
+def test_docs_stream_rejects_broken_number():
+    """Число "2." без дробной части не принимается за 2"""
+    stream = DocsStream(ChunkedResponse(b'{"docs": [2.]}', 3))
+
+    with pytest.raises(ValueError):
+        list(stream)
+
+
+@allure.feature("API Infrastructure")
+@allure.title("selectFields по верхнему уровню полей")
+def test_select_fields():
+    """Вложенные поля сводятся к верхнему уровню, id всегда первым"""
+    assert select_fields("name", "rating.kp", "rating.imdb") == {
+        "selectFields": ["id", "name", "rating"]}
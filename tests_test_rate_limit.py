@@ -0,0 +1,167 @@
+import email.utils
+import json
+
+import allure
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api.cassette import build_response
+from api.rate_limit import RateLimitAdapter, SharedTokenBucket, retry_after
+
+URL = "http://kinopoisk.test/v1.4/movie"
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Транспорт, отдающий заранее заданные статусы и заголовки."""
+
+    def __init__(self, *responses) -> None:
+        super().__init__()
+        self.responses = list(responses)
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        status, headers = self.responses[min(self.sent,
+                                             len(self.responses) - 1)]
+        self.sent += 1
+        return build_response(request, status, '',
+                              json.dumps(headers), b'{}')
+
+    def close(self) -> None:
+        pass
+
+
+class Clock:
+    """Управляемое время: sleep сдвигает часы вместо ожидания."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("api.rate_limit.time.time", clock.time)
+    monkeypatch.setattr("api.rate_limit.time.sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def bucket(tmp_path, clock):
+    bucket = SharedTokenBucket(str(tmp_path / "rate.sqlite"), rate=10,
+                               burst=2)
+    yield bucket
+    bucket.close()
+
+
+def session_with(adapter: BaseAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", adapter)
+    return session
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Пополнение token bucket")
+def test_bucket_refills_at_rate(bucket, clock):
+    """burst запросов сразу, дальше по одному токену за 1/rate секунды;
+    за долгий простой копится не больше burst"""
+    assert bucket._take() == 0
+    assert bucket._take() == 0
+    assert bucket._take() == pytest.approx(0.1)
+
+    clock.now += 0.05
+    assert bucket._take() == pytest.approx(0.05)
+    clock.now += 0.05
+    assert bucket._take() == 0
+
+    clock.now += 60
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket._take() == pytest.approx(0.1)
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Пауза для всех воркеров по Retry-After")
+def test_bucket_block_pauses_everyone(bucket, clock, tmp_path):
+    """block() действует и на другой экземпляр с тем же файлом"""
+    other = SharedTokenBucket(str(tmp_path / "rate.sqlite"), rate=10, burst=2)
+    bucket.block(3)
+
+    assert other._take() == pytest.approx(3)
+    clock.now += 3
+    assert other._take() == 0
+    other.close()
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Разбор Retry-After")
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("2", 2.0),
+    ("-5", 0.0),
+    ("завтра", None),
+    (email.utils.formatdate(1_000_030.0, usegmt=True), 30.0),
+])
+def test_retry_after(clock, value, expected):
+    """Секунды или HTTP-дата относительно текущего времени"""
+    response = requests.Response()
+    if value is not None:
+        response.headers["Retry-After"] = value
+
+    assert retry_after(response) == expected
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Повтор 429 с ожиданием Retry-After")
+def test_adapter_retries_with_retry_after(clock):
+    """Без bucket пауза берётся из Retry-After, затем запрос повторяется"""
+    network = ScriptedAdapter((429, {"Retry-After": "2"}),
+                              (503, {"Retry-After": "1"}), (200, {}))
+    adapter = RateLimitAdapter(inner=network)
+
+    response = session_with(adapter).get(URL)
+
+    assert response.status_code == 200
+    assert network.sent == 3
+    assert adapter.retried == 2
+    assert clock.sleeps == [2.0, 1.0]
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Повтор с bucket блокирует квоту")
+def test_adapter_blocks_bucket(bucket, clock):
+    """С bucket пауза по Retry-After уходит в общую квоту"""
+    network = ScriptedAdapter((429, {"Retry-After": "4"}), (200, {}))
+    adapter = RateLimitAdapter(bucket, inner=network)
+
+    response = session_with(adapter).get(URL)
+
+    assert response.status_code == 200
+    assert adapter.throttled_time == pytest.approx(4)
+    assert clock.sleeps == [pytest.approx(4)]
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Ответ 429 после исчерпания повторов")
+def test_adapter_gives_up(clock):
+    """После max_retries возвращается последний ответ; без Retry-After
+    пауза не больше экспоненциальной границы"""
+    network = ScriptedAdapter((429, {}))
+    adapter = RateLimitAdapter(max_retries=3, backoff=0.5, inner=network)
+
+    response = session_with(adapter).get(URL)
+
+    assert response.status_code == 429
+    assert network.sent == 4
+    assert adapter.retried == 3
+    assert len(clock.sleeps) == 3
+    assert all(0 <= delay <= 0.5 * 2 ** attempt
+               for attempt, delay in enumerate(clock.sleeps))
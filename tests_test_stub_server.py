@@ -0,0 +1,115 @@
+import time
+
+import allure
+import pytest
+import requests
+
+from api.stub_server import Catalog, StubServer, page_of, parse_range
+
+HEADERS = {"x-api-key": "offline"}
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return Catalog(2000, seed=7)
+
+
+def get(server, target, headers=HEADERS):
+    return server.route("GET", target, headers)
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Проверка токена")
+def test_stub_requires_api_key(catalog):
+    """Без X-API-KEY или с чужим ключом - 401"""
+    server = StubServer(catalog, api_key="secret")
+
+    assert get(server, "/v1.4/movie", {})[0] == 401
+    assert get(server, "/v1.4/movie", HEADERS)[0] == 401
+    assert get(server, "/v1.4/movie", {"x-api-key": "secret"})[0] == 200
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Фильтры, сортировка и страницы выдачи")
+def test_stub_filter_and_pages(catalog):
+    """Рейтинг и год соблюдаются, страницы не пересекаются"""
+    server = StubServer(catalog)
+    query = ("/v1.4/movie?rating.kp=7-10&year=2000-2010"
+             "&sortField=rating.kp&sortType=-1&limit=20")
+
+    status, first, _ = get(server, query + "&page=1")
+    _, second, _ = get(server, query + "&page=2")
+    docs = first["docs"] + second["docs"]
+
+    assert status == 200
+    assert first["pages"] == (first["total"] + 19) // 20
+    assert all(7 <= doc["rating"]["kp"] <= 10 for doc in docs)
+    assert all(2000 <= doc["year"] <= 2010 for doc in docs)
+    ratings = [doc["rating"]["kp"] for doc in docs]
+    assert ratings == sorted(ratings, reverse=True)
+    assert len({doc["id"] for doc in docs}) == len(docs)
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Поиск, карточка фильма и selectFields")
+def test_stub_search_and_details(catalog):
+    """Известные тестам фильмы находятся, лишние поля отбрасываются"""
+    server = StubServer(catalog)
+
+    _, found, _ = get(server, "/v1.4/movie/search?query=Школа&limit=5"
+                              "&selectFields=id&selectFields=name")
+    status, movie, _ = get(server, "/v1.4/movie/493098")
+
+    assert [doc["name"] for doc in found["docs"][:2]] == ["Школа", "Школа"]
+    assert set(found["docs"][0]) == {"id", "name"}
+    assert status == 200 and movie["year"] == 2010
+    assert get(server, "/v1.4/movie/999999999")[0] == 404
+    assert get(server, "/v1.4/movie?page=x")[0] == 400
+    assert server.route("POST", "/v1.4/movie", HEADERS)[0] == 405
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Инъекция 429 и ошибок")
+def test_stub_injects_errors(catalog):
+    """rate_429 и error_rate подменяют ответ, 429 несёт Retry-After"""
+    status, _, headers = get(StubServer(catalog, rate_429=1.0), "/v1.4/movie")
+    assert (status, headers) == (429, {"Retry-After": "1"})
+    assert get(StubServer(catalog, error_rate=1.0), "/v1.4/movie")[0] == 500
+
+    server = StubServer(catalog, error_rate=0.3, seed=1)
+    statuses = [get(server, "/v1.4/movie")[0] for _ in range(1000)]
+    assert 200 < statuses.count(500) < 400
+
+
+@allure.feature("API Infrastructure")
+@allure.title("Вспомогательные функции страниц и диапазонов")
+def test_stub_helpers():
+    """page_of считает число страниц, parse_range понимает одно значение"""
+    assert page_of(range(45), 3, 20) == ([40, 41, 42, 43, 44], 3)
+    assert page_of([], 1, 20) == ([], 0)
+    assert parse_range("8-10", float) == (8.0, 10.0)
+    assert parse_range("2023", int) == (2023, 2023)
+
+
+@allure.feature("API Infrastructure")
+@allure.title("HTTP keep-alive и остановка с открытым соединением")
+def test_stub_http_keep_alive(catalog):
+    """Запросы идут по одному соединению, stop() не ждёт клиента"""
+    server = StubServer(catalog)
+    base_url = server.run_in_thread()
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    try:
+        first = session.get(f"{base_url}/v1.4/movie", params={"limit": 3})
+        second = session.get(f"{base_url}/v1.4/movie/493098")
+
+        assert first.status_code == second.status_code == 200
+        assert len(first.json()["docs"]) == 3
+        assert first.headers["Connection"] == "keep-alive"
+        assert server.requests == 2
+    finally:
+        started = time.perf_counter()
+        server.stop()
+        stopped = time.perf_counter() - started
+        session.close()
+    assert stopped < 2
@@ -0,0 +1 @@
+"""Инструменты запуска тестов."""
@@ -0,0 +1,224 @@
+"""Нагрузочный прогон запросов API-тестов.
+
+Запросы API-тестов (api.requests_spec) воспроизводятся как сценарии с весами в
+закрытом цикле (N одновременных клиентов) или открытом (фиксированная
+частота запросов). Отчёт: p50/p95/p99, пропускная способность и
+ошибки по типам.
+
+    python -m tools.bench --stub --duration 10 --concurrency 50
+    python -m tools.bench --mode open --rate 200 --json bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from api.async_client import AsyncApiClient
+from api.requests_spec import REQUESTS
+
+# Веса сценариев в смеси запросов
+WEIGHTS: Dict[str, int] = {
+    'key_valid': 1,
+    'search': 3,
+    'high_rated': 2,
+    'by_year': 2,
+    'details': 3,
+    'pagination': 1,
+}
+
+# Сценарии: имя -> (путь, параметры, вес)
+SCENARIOS: Dict[str, Tuple[str, Dict[str, Any], int]] = {
+    name: (*REQUESTS[name], weight) for name, weight in WEIGHTS.items()
+}
+
+
+def positive_float(value: str) -> float:
+    """Тип аргумента argparse: число больше нуля."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"нужно число больше 0: {value}")
+    return number
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Процентиль по отсортированному списку (ближайший ранг)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Накопление задержек и ошибок по сценариям."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, name: str, latency: float, error: Optional[str]) -> None:
+        self.latencies[name].append(latency)
+        if error:
+            self.errors[name][error] += 1
+
+    def _stats(self, latencies: List[float], errors: Counter,
+               elapsed: float) -> Dict[str, Any]:
+        values = sorted(latencies)
+        return {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+            'errors': dict(errors),
+        }
+
+    def report(self, elapsed: float, settings: Dict[str, Any]) -> Dict[str,
+                                                                       Any]:
+        total_latencies = [v for values in self.latencies.values()
+                           for v in values]
+        total_errors: Counter = Counter()
+        for errors in self.errors.values():
+            total_errors.update(errors)
+        return {
+            'settings': settings,
+            'elapsed_s': round(elapsed, 3),
+            'total': self._stats(total_latencies, total_errors, elapsed),
+            'scenarios': {
+                name: self._stats(values, self.errors[name], elapsed)
+                for name, values in sorted(self.latencies.items())
+            },
+        }
+
+
+async def _call(client: AsyncApiClient, recorder: Recorder, name: str,
+                scheduled: float) -> None:
+    path, params, _ = SCENARIOS[name]
+    error = None
+    try:
+        response = await client.get(path, params)
+        if response.status_code >= 400:
+            error = str(response.status_code)
+    except Exception as e:
+        error = type(e).__name__
+    # Задержка считается от запланированного момента (coordinated omission)
+    recorder.add(name, time.perf_counter() - scheduled, error)
+
+
+async def _closed_loop(client: AsyncApiClient, recorder: Recorder,
+                       names: List[str], weights: List[int],
+                       concurrency: int, deadline: float,
+                       rnd: random.Random) -> None:
+    async def user() -> None:
+        while time.perf_counter() < deadline:
+            name = rnd.choices(names, weights)[0]
+            await _call(client, recorder, name, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def _open_loop(client: AsyncApiClient, recorder: Recorder,
+                     names: List[str], weights: List[int], rate: float,
+                     deadline: float, rnd: random.Random) -> None:
+    tasks = []
+    interval = 1.0 / rate
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        name = rnd.choices(names, weights)[0]
+        tasks.append(asyncio.ensure_future(
+            _call(client, recorder, name, scheduled)))
+        scheduled += interval
+    await asyncio.gather(*tasks)
+
+
+async def benchmark(base_url: str, api_key: str, duration: float = 10.0,
+                    concurrency: int = 20, mode: str = 'closed',
+                    rate: float = 100.0,
+                    scenarios: Optional[Sequence[str]] = None,
+                    seed: Optional[int] = None) -> Dict[str, Any]:
+    """Нагрузочный прогон; возвращает отчёт в виде словаря."""
+    if mode == 'open' and rate <= 0:
+        raise ValueError(f"Частота открытого цикла должна быть больше 0: "
+                         f"{rate}")
+    names = list(scenarios or SCENARIOS)
+    weights = [SCENARIOS[name][2] for name in names]
+    rnd = random.Random(seed)
+    recorder = Recorder()
+    settings = {'base_url': base_url, 'mode': mode, 'duration_s': duration,
+                'concurrency': concurrency, 'scenarios': names}
+    if mode == 'open':
+        settings['rate_rps'] = rate
+
+    # Без повторов 429/503: иначе они пропадают из разбивки ошибок и
+    # превращаются в лишнюю задержку
+    async with AsyncApiClient(api_key, base_url, concurrency=concurrency,
+                              max_retries=0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        if mode == 'open':
+            await _open_loop(client, recorder, names, weights, rate,
+                             deadline, rnd)
+        else:
+            await _closed_loop(client, recorder, names, weights,
+                               concurrency, deadline, rnd)
+        elapsed = time.perf_counter() - started
+    return recorder.report(elapsed, settings)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=os.getenv(
+        'KINOPOISK_API_URL', 'https://api.kinopoisk.dev'))
+    parser.add_argument('--api-key', default=os.getenv(
+        'KINOPOISK_API_KEY', 'GGTYBTW-0VB4NX1-G4REM52-0Y8V7Y6'))
+    parser.add_argument('--stub', action='store_true',
+                        help='поднять локальную замену API (api.stub_server)')
+    parser.add_argument('--stub-movies', type=int, default=100_000)
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--mode', choices=('closed', 'open'),
+                        default='closed')
+    parser.add_argument('--rate', type=positive_float, default=100.0,
+                        help='запросов в секунду для --mode open')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='сценарий (можно несколько), по умолчанию все')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', help='файл для отчёта')
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if args.stub:
+        from api.stub_server import Catalog, StubServer
+        server = StubServer(Catalog(args.stub_movies),
+                            latency_ms=args.stub_latency_ms, seed=args.seed)
+        url = server.run_in_thread()
+    try:
+        report = asyncio.run(benchmark(
+            url, args.api_key, args.duration, args.concurrency, args.mode,
+            args.rate, args.scenario, args.seed))
+    finally:
+        if server is not None:
+            server.stop()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Сверка страниц фильмов на сайте с данными API.
+
+Для каждого ID данные берутся из API (асинхронно, пачками) и со страницы
+https://www.kinopoisk.ru/film/{id}/ (пул браузеров), затем сравниваются
+название, год и рейтинг. Прогресс хранится в SQLite, повторный запуск
+продолжает с необработанных ID.
+
+    python -m tools.crawler --ids-file ids.txt --browsers 4
+    python -m tools.crawler --count 5000 --report crawl.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from api.async_client import AsyncApiClient
+from ui.pool import BrowserPool
+
+DEFAULT_DB = os.getenv('CRAWL_DB', '.cache/crawl.sqlite')
+FILM_URL = "https://www.kinopoisk.ru/film/{}/"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    api TEXT,
+    ui TEXT,
+    mismatches TEXT,
+    error TEXT,
+    worker TEXT,
+    elapsed REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+"""
+
+# Название, год и рейтинг со страницы фильма: JSON-LD, затем разметка
+_EXTRACT_SCRIPT = """
+const result = {title: null, year: null, rating: null};
+for (const node of document.querySelectorAll(
+        'script[type="application/ld+json"]')) {
+    try {
+        const data = JSON.parse(node.textContent);
+        result.title = result.title || data.name || null;
+        const date = data.datePublished || data.dateCreated || '';
+        result.year = result.year || parseInt(date.slice(0, 4)) || null;
+        if (data.aggregateRating) {
+            result.rating = parseFloat(data.aggregateRating.ratingValue);
+        }
+    } catch (e) {}
+}
+if (!result.title) {
+    const h1 = document.querySelector('h1');
+    result.title = h1 ? h1.textContent.replace(/\\s*\\(\\d{4}\\)\\s*$/, '') : null;
+}
+if (!result.year) {
+    const match = (document.title || '').match(/\\b(19|20)\\d{2}\\b/);
+    result.year = match ? parseInt(match[0]) : null;
+}
+if (result.rating === null || isNaN(result.rating)) {
+    const node = document.querySelector(
+        "[class*='film-rating-value'], [data-tid*='rating'] span");
+    const value = node ? parseFloat(node.textContent.replace(',', '.')) : NaN;
+    result.rating = isNaN(value) ? null : value;
+}
+return result;
+"""
+
+
+def normalize_title(title: Optional[str]) -> str:
+    return ' '.join((title or '').replace('ё', 'е').replace('Ё', 'Е')
+                    .casefold().split())
+
+
+def compare(api: Dict[str, Any], ui: Dict[str, Any],
+            rating_tolerance: float = 0.1) -> List[str]:
+    """Поля, в которых страница расходится с API."""
+    mismatches = []
+    if normalize_title(api.get('title')) != normalize_title(ui.get('title')):
+        mismatches.append('title')
+    if api.get('year') != ui.get('year'):
+        mismatches.append('year')
+    api_rating, ui_rating = api.get('rating'), ui.get('rating')
+    if (api_rating is None) != (ui_rating is None) or (
+            api_rating is not None
+            and abs(api_rating - ui_rating) > rating_tolerance):
+        mismatches.append('rating')
+    return mismatches
+
+
+class CrawlQueue:
+    """Очередь ID с прогрессом в SQLite: статусы pending/done/error."""
+
+    def __init__(self, path: str = DEFAULT_DB) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, ids: Iterable[int]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (id) VALUES (?)",
+                ((int(i),) for i in ids))
+
+    def pending(self, retry_errors: bool = True) -> List[int]:
+        statuses = ('pending', 'error') if retry_errors else ('pending',)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM items WHERE status IN "
+                f"({', '.join('?' * len(statuses))}) ORDER BY id",
+                statuses).fetchall()
+        return [row[0] for row in rows]
+
+    def without_api(self, ids: Sequence[int]) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM items WHERE api IS NULL").fetchall()
+        missing = {row[0] for row in rows}
+        return [i for i in ids if i in missing]
+
+    def set_api(self, data: Dict[int, Dict[str, Any]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE items SET api = ? WHERE id = ?",
+                ((json.dumps(value, ensure_ascii=False), key)
+                 for key, value in data.items()))
+
+    def api(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT api FROM items WHERE id = ?", (movie_id,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def finish(self, movie_id: int, worker: str, elapsed: float,
+               ui: Optional[Dict[str, Any]] = None,
+               mismatches: Optional[List[str]] = None,
+               error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE items SET status = ?, ui = ?, mismatches = ?, "
+                "error = ?, worker = ?, elapsed = ?, finished_at = ? "
+                "WHERE id = ?",
+                ('error' if error else 'done',
+                 json.dumps(ui, ensure_ascii=False) if ui else None,
+                 json.dumps(mismatches) if mismatches is not None else None,
+                 error, worker, elapsed, time.time(), movie_id))
+
+    def report(self, limit: int = 500) -> Dict[str, Any]:
+        """Сводка по статусам и список расхождений."""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM items GROUP BY status"))
+            rows = self._conn.execute(
+                "SELECT id, api, ui, mismatches FROM items "
+                "WHERE status = 'done' AND mismatches != '[]' "
+                "ORDER BY id LIMIT ?", (limit,)).fetchall()
+            errors = self._conn.execute(
+                "SELECT error, COUNT(*) FROM items WHERE status = 'error' "
+                "GROUP BY error ORDER BY 2 DESC LIMIT 20").fetchall()
+        return {
+            'statuses': counts,
+            'errors': dict(errors),
+            'mismatches': [
+                {'id': movie_id, 'fields': json.loads(fields),
+                 'api': json.loads(api or 'null'),
+                 'ui': json.loads(ui or 'null')}
+                for movie_id, api, ui, fields in rows
+            ],
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def api_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    rating = (doc.get('rating') or {}).get('kp')
+    return {'title': doc.get('name'), 'year': doc.get('year'),
+            'rating': round(rating, 1) if rating else None}
+
+
+async def fetch_api(crawl: CrawlQueue, ids: Sequence[int], api_key: str,
+                    base_url: str, concurrency: int = 20,
+                    batch: int = 500) -> int:
+    """Данные API для ID, у которых их ещё нет; возвращает число ошибок."""
+    errors = 0
+    async with AsyncApiClient(api_key, base_url,
+                              concurrency=concurrency) as client:
+        for start in range(0, len(ids), batch):
+            chunk = ids[start:start + batch]
+            responses = await asyncio.gather(
+                *(client.get(f"/v1.4/movie/{i}") for i in chunk),
+                return_exceptions=True)
+            data = {}
+            for movie_id, response in zip(chunk, responses):
+                if isinstance(response, BaseException) or \
+                        response.status_code != 200:
+                    errors += 1
+                    continue
+                data[movie_id] = api_fields(response.json())
+            crawl.set_api(data)
+    return errors
+
+
+def _ui_worker(name: str, pool: BrowserPool, crawl: CrawlQueue,
+               work: "queue.Queue[int]", stats: Dict[str, Dict[str, float]],
+               tolerance: float) -> None:
+    while True:
+        try:
+            movie_id = work.get_nowait()
+        except queue.Empty:
+            return
+        started = time.perf_counter()
+        api = crawl.api(movie_id)
+        if api is None:
+            crawl.finish(movie_id, name, 0.0, error='api')
+            continue
+        try:
+            with pool.lease() as driver:
+                driver.get(FILM_URL.format(movie_id))
+                ui = driver.execute_script(_EXTRACT_SCRIPT)
+        except Exception as e:
+            crawl.finish(movie_id, name, time.perf_counter() - started,
+                         error=type(e).__name__)
+            continue
+        elapsed = time.perf_counter() - started
+        crawl.finish(movie_id, name, elapsed, ui=ui,
+                     mismatches=compare(api, ui, tolerance))
+        stats[name]['pages'] += 1
+        stats[name]['busy_s'] += elapsed
+
+
+def crawl_ui(crawl: CrawlQueue, ids: Sequence[int], pool: BrowserPool,
+             workers: int, tolerance: float = 0.1) -> Dict[str, Any]:
+    """Рендер страниц в пуле браузеров; пропускная способность по воркерам."""
+    work: "queue.Queue[int]" = queue.Queue()
+    for movie_id in ids:
+        work.put(movie_id)
+    stats = {f"crawler-{i}": {'pages': 0, 'busy_s': 0.0}
+             for i in range(workers)}
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=_ui_worker, name=f"crawler-{i}",
+                         args=(f"crawler-{i}", pool, crawl, work, stats,
+                               tolerance))
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'elapsed_s': round(elapsed, 1),
+        'pages_per_min': round(
+            sum(s['pages'] for s in stats.values()) / elapsed * 60, 1)
+        if elapsed else 0.0,
+        'workers': {
+            name: {'pages': s['pages'],
+                   'pages_per_min': round(s['pages'] / elapsed * 60, 1)
+                   if elapsed else 0.0}
+            for name, s in sorted(stats.items())
+        },
+    }
+
+
+def sample_ids(session: Any, base_url: str, count: int) -> List[int]:
+    """ID фильмов из выдачи API (по убыванию числа голосов)."""
+    from api.paginator import Paginator
+
+    pages = Paginator(session, f"{base_url}/v1.4/movie",
+                      {"sortField": "votes.kp", "sortType": "-1"},
+                      max_pages=-(-count // 250), fields=('id',))
+    return [doc['id'] for doc, _ in zip(pages, range(count))]
+
+
+def run(crawl: CrawlQueue, pool: BrowserPool, api_key: str, base_url: str,
+        workers: int = 1, concurrency: int = 20,
+        tolerance: float = 0.1) -> Dict[str, Any]:
+    """Полный проход по необработанным ID очереди."""
+    ids = crawl.pending()
+    api_errors = asyncio.run(fetch_api(
+        crawl, crawl.without_api(ids), api_key, base_url, concurrency))
+    throughput = crawl_ui(crawl, ids, pool, workers, tolerance)
+    report = crawl.report()
+    report.update(throughput=throughput, processed=len(ids),
+                  api_errors=api_errors)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=os.getenv(
+        'KINOPOISK_API_URL', 'https://api.kinopoisk.dev'))
+    parser.add_argument('--api-key', default=os.getenv(
+        'KINOPOISK_API_KEY', 'GGTYBTW-0VB4NX1-G4REM52-0Y8V7Y6'))
+    parser.add_argument('--ids-file', help='файл с ID, по одному в строке')
+    parser.add_argument('--count', type=int, default=0,
+                        help='взять столько ID из выдачи API')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--browsers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='допустимая разница рейтинга')
+    parser.add_argument('--report', help='файл для отчёта')
+    args = parser.parse_args(argv)
+
+    crawl = CrawlQueue(args.db)
+    if args.ids_file:
+        with open(args.ids_file, encoding='utf-8') as f:
+            crawl.add(int(line) for line in f if line.strip())
+    if args.count:
+        from api.client import create_session
+
+        session = create_session(args.api_key)
+        try:
+            crawl.add(sample_ids(session, args.url, args.count))
+        finally:
+            session.close()
+
+    pool = BrowserPool(size=args.browsers)
+    try:
+        report = run(crawl, pool, args.api_key, args.url, args.browsers,
+                     args.concurrency, args.tolerance)
+    finally:
+        pool.close()
+        crawl.close()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
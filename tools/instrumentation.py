@@ -0,0 +1,206 @@
+"""Замеры скорости самих тестов по шагам Allure.
+
+Для каждого шага (``allure.step``) считаются длительность, число команд
+WebDriver, HTTP-запросов, переданные байты и время ожиданий. В конце
+прогона пишется JSON и сравнение с предыдущими прогонами.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import allure_commons
+import requests
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+COUNTERS = ('commands', 'command_bytes', 'http_requests', 'http_bytes',
+            'wait_s', 'attachments_bytes')
+
+
+class _Frame:
+    def __init__(self, title: str) -> None:
+        self.title = title
+        self.started = time.perf_counter()
+        self.counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+
+    def result(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            'title': self.title,
+            'duration_s': round(time.perf_counter() - self.started, 4),
+        }
+        data.update({k: round(v, 4) for k, v in self.counters.items()})
+        return data
+
+
+class Instrumentation:
+    """Сбор замеров; шаги берутся из хуков allure_commons."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stack: List[_Frame] = []
+        self._steps: Dict[str, _Frame] = {}
+        self._test: Optional[_Frame] = None
+        self.tests: Dict[str, Dict[str, Any]] = {}
+
+    # --- счётчики ---------------------------------------------------------
+
+    def add(self, counter: str, value: float = 1) -> None:
+        """Добавление к счётчику текущего теста и всех открытых шагов."""
+        with self._lock:
+            frames = list(self._stack)
+            if self._test is not None:
+                frames.append(self._test)
+            for frame in frames:
+                frame.counters[counter] += value
+
+    # --- тесты и шаги -----------------------------------------------------
+
+    def start_test(self, nodeid: str) -> None:
+        with self._lock:
+            self._test = _Frame(nodeid)
+            self._stack.clear()
+            self._steps.clear()
+            self.tests[nodeid] = {'steps': []}
+
+    def finish_test(self, nodeid: str) -> None:
+        with self._lock:
+            if self._test is None:
+                return
+            self.tests[nodeid].update(self._test.result())
+            self._test = None
+
+    def annotate(self, **values: Any) -> None:
+        """Дополнительные поля текущего теста (например, пик памяти)."""
+        with self._lock:
+            if self._test is not None:
+                self.tests[self._test.title].update(values)
+
+    @allure_commons.hookimpl
+    def start_step(self, uuid: str, title: str, params: Any) -> None:
+        with self._lock:
+            frame = _Frame(title)
+            self._steps[uuid] = frame
+            self._stack.append(frame)
+
+    @allure_commons.hookimpl
+    def stop_step(self, uuid: str, exc_type: Any, exc_val: Any,
+                  exc_tb: Any) -> None:
+        with self._lock:
+            frame = self._steps.pop(uuid, None)
+            if frame is None:
+                return
+            if frame in self._stack:
+                self._stack.remove(frame)
+            if self._test is not None:
+                self.tests[self._test.title]['steps'].append(frame.result())
+
+    @allure_commons.hookimpl
+    def attach_data(self, body: Any, name: str, attachment_type: Any,
+                    extension: Any) -> None:
+        size = len(body) if isinstance(body, (bytes, str)) else 0
+        self.add('attachments_bytes', size)
+
+    # --- подключение к WebDriver и requests -----------------------------
+
+    def instrument_driver(self, driver: WebDriver) -> WebDriver:
+        """Подсчёт команд WebDriver и размера их ответов."""
+        executor = driver.command_executor
+        original = executor.execute
+
+        def execute(command: str, params: Dict[str, Any]) -> Any:
+            response = original(command, params)
+            self.add('commands')
+            self.add('command_bytes', len(json.dumps(
+                response, ensure_ascii=False, default=str)))
+            return response
+
+        executor.execute = execute
+        return driver
+
+    def instrument_session(self, session: requests.Session) -> None:
+        """Подсчёт HTTP-запросов сессии и размера ответов."""
+        def on_response(response: requests.Response, *args: Any,
+                        **kwargs: Any) -> None:
+            size = int(response.headers.get('Content-Length') or 0)
+            if not size and response._content:
+                size = len(response._content)
+            self.add('http_requests')
+            self.add('http_bytes', size)
+
+        session.hooks['response'].append(on_response)
+
+    # --- отчёт -----------------------------------------------------------
+
+    def write(self, directory: str, worker: str = '',
+              history: int = 5, threshold: float = 0.2,
+              keep: int = 20) -> Dict[str, Any]:
+        """Запись отчёта прогона и сравнение с предыдущими прогонами.
+
+        В каталоге остаются только ``keep`` последних отчётов.
+        """
+        os.makedirs(directory, exist_ok=True)
+        previous = sorted(glob.glob(os.path.join(directory, 'run-*.json')))
+        baseline: Dict[str, List[float]] = {}
+        for path in previous[-history:]:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    run = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nodeid, test in run.get('tests', {}).items():
+                if 'duration_s' in test:
+                    baseline.setdefault(nodeid, []).append(test['duration_s'])
+
+        trend = {}
+        for nodeid, test in self.tests.items():
+            if nodeid not in baseline or 'duration_s' not in test:
+                continue
+            mean = sum(baseline[nodeid]) / len(baseline[nodeid])
+            change = (test['duration_s'] - mean) / mean if mean else 0.0
+            trend[nodeid] = {
+                'duration_s': test['duration_s'],
+                'baseline_s': round(mean, 4),
+                'change': round(change, 3),
+                'regression': change > threshold,
+            }
+
+        report = {'created': time.time(), 'worker': worker,
+                  'tests': self.tests, 'trend': trend}
+        suffix = f"-{worker}" if worker else ''
+        path = os.path.join(
+            directory, f"run-{time.strftime('%Y%m%d-%H%M%S')}{suffix}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        reports = sorted(glob.glob(os.path.join(directory, 'run-*.json')))
+        for old in reports[:max(0, len(reports) - keep)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return report
+
+
+_instance: Optional[Instrumentation] = None
+
+
+def enable() -> Instrumentation:
+    """Включение замеров и регистрация в allure_commons."""
+    global _instance
+    if _instance is None:
+        _instance = Instrumentation()
+        allure_commons.plugin_manager.register(_instance)
+    return _instance
+
+
+def current() -> Optional[Instrumentation]:
+    """Активный сборщик замеров, если замеры включены."""
+    return _instance
+
+
+def add(counter: str, value: float = 1) -> None:
+    """Добавление к счётчику, если замеры включены."""
+    if _instance is not None:
+        _instance.add(counter, value)
@@ -0,0 +1,295 @@
+"""Параллельный запуск тестов по воркерам.
+
+Тесты распределяются по процессам по исторической длительности
+(сначала самые долгие, каждому - наименее загруженный воркер), а внутри
+воркера идут по убыванию вероятности падения на секунду работы, чтобы
+падение обнаруживалось как можно раньше. Нестабильные тесты (результат
+часто меняется) выносятся в отдельный карантинный прогон с повторами.
+У каждого воркера свой pytest-процесс, а значит свой пул браузеров и
+своя requests.Session. Результаты Allure пишутся в отдельные каталоги
+воркеров и объединяются в конце.
+
+    python -m tools.parallel -n 4 tests_test_api.py tests_test_ui.py
+    python -m tools.parallel -n 4 -k api --fail-fast -- -v -s
+
+Аргументы после ``--`` передаются pytest без изменений. Логи воркеров
+пишутся в ``--logdir`` (.cache/parallel).
+"""
+import argparse
+import heapq
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from db import history
+
+DEFAULT_DURATION = 1.0
+
+Stats = Dict[str, Dict[str, Any]]
+
+
+def collect(args: Sequence[str], keyword: Optional[str] = None,
+            markers: Optional[str] = None) -> List[str]:
+    """Список nodeid тестов через pytest --collect-only (с фильтрами -k и
+    -m, чтобы в расписание не попадали отобранные тесты).
+
+    Ошибка сбора (импорт, синтаксис) поднимает CalledProcessError с
+    выводом pytest; код 5 (тестов нет) ошибкой не считается.
+    """
+    filters = [*(['-k', keyword] if keyword else []),
+               *(['-m', markers] if markers else [])]
+    cmd = [sys.executable, '-m', 'pytest', '--collect-only', '-q', *filters,
+           *args]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode not in (0, 5):
+        raise subprocess.CalledProcessError(result.returncode, cmd,
+                                            result.stdout, result.stderr)
+    return [line.strip() for line in result.stdout.splitlines()
+            if '::' in line and not line.startswith(' ')]
+
+
+def failure_risk(stat: Optional[Dict[str, Any]]) -> float:
+    """Оценка вероятности падения по истории (со сглаживанием Лапласа).
+
+    Новый тест без истории получает 0.5, упавший в прошлый раз -
+    надбавку.
+    """
+    if not stat:
+        return 0.5
+    risk = (stat['failures'] + 1) / (stat['runs'] + 2)
+    if stat['last'] == 'failed':
+        risk = min(1.0, risk + 0.5)
+    return risk
+
+
+def is_flaky(stat: Optional[Dict[str, Any]], min_runs: int = 4,
+             min_flip_rate: float = 0.3) -> bool:
+    """Результат теста часто меняется между прогонами."""
+    if not stat or stat['runs'] < min_runs:
+        return False
+    return stat['flips'] / (stat['runs'] - 1) >= min_flip_rate
+
+
+def prioritize(nodeids: Sequence[str], stats: Stats) -> List[str]:
+    """Порядок запуска: сначала тесты с наибольшей вероятностью падения
+    на секунду работы."""
+    default = (statistics.median(s['duration'] for s in stats.values())
+               if stats else DEFAULT_DURATION)
+
+    def key(nodeid: str) -> float:
+        stat = stats.get(nodeid)
+        duration = stat['duration'] if stat else default
+        return -failure_risk(stat) / max(duration, 0.01)
+
+    return sorted(nodeids, key=key)
+
+
+def schedule(nodeids: Sequence[str], workers: int,
+             known: Dict[str, float],
+             stats: Optional[Stats] = None) -> List[List[str]]:
+    """Распределение тестов по воркерам: longest processing time first.
+
+    Если передана статистика, тесты каждого воркера упорядочиваются
+    через prioritize().
+    """
+    default = statistics.median(known.values()) if known else DEFAULT_DURATION
+    weighted = sorted(
+        ((known.get(nodeid, default), nodeid) for nodeid in nodeids),
+        reverse=True
+    )
+    bins: List[Tuple[float, int]] = [(0.0, i) for i in range(workers)]
+    shards: List[List[str]] = [[] for _ in range(workers)]
+    for duration, nodeid in weighted:
+        load, index = heapq.heappop(bins)
+        shards[index].append(nodeid)
+        heapq.heappush(bins, (load + duration, index))
+    if stats is not None:
+        shards = [prioritize(shard, stats) for shard in shards]
+    return [shard for shard in shards if shard]
+
+
+def merge_allure(shard_dirs: Sequence[str], target: str) -> int:
+    """Перенос результатов воркеров в общий каталог Allure."""
+    os.makedirs(target, exist_ok=True)
+    moved = 0
+    for shard in shard_dirs:
+        if not os.path.isdir(shard):
+            continue
+        for name in os.listdir(shard):
+            shutil.move(os.path.join(shard, name), os.path.join(target, name))
+            moved += 1
+        shutil.rmtree(shard, ignore_errors=True)
+    return moved
+
+
+def _spawn(name: str, nodeids: Sequence[str], logdir: str,
+           shard_dir: str, pytest_args: Sequence[str],
+           worker_count: int, session: str = '',
+           retry: bool = False) -> Tuple[subprocess.Popen, Any]:
+    env = dict(os.environ,
+               PYTEST_WORKER_ID=name,
+               PYTEST_WORKER_COUNT=str(worker_count),
+               PYTEST_SESSION_ID=session or uuid.uuid4().hex,
+               PYTEST_RETRY='1' if retry else '0',
+               TEST_HISTORY='1',
+               TEST_ORDER='file')
+    log = open(os.path.join(logdir, f'{name}.log'), 'w')
+    cmd = [sys.executable, '-m', 'pytest', *pytest_args,
+           f'--alluredir={shard_dir}', *nodeids]
+    return subprocess.Popen(cmd, env=env, stdout=log,
+                            stderr=subprocess.STDOUT), log
+
+
+def _wait(processes: List[Tuple[str, subprocess.Popen, Any]],
+          fail_fast: bool) -> List[int]:
+    """Ожидание воркеров; при fail_fast первое падение останавливает
+    остальных."""
+    codes: Dict[str, int] = {}
+    while len(codes) < len(processes):
+        for name, process, log in processes:
+            if name in codes or process.poll() is None:
+                continue
+            codes[name] = process.returncode
+            log.close()
+            print(f"🏁 {name}: код {process.returncode}")
+            if fail_fast and process.returncode not in (0, 5):
+                for other, running, _ in processes:
+                    if other not in codes and running.poll() is None:
+                        print(f"⛔ {other}: остановлен после падения {name}")
+                        running.terminate()
+        time.sleep(0.2)
+    return list(codes.values())
+
+
+def run_quarantine(nodeids: Sequence[str], logdir: str,
+                   shard_root: str, pytest_args: Sequence[str],
+                   retries: int) -> Tuple[List[str], List[str]]:
+    """Карантинный прогон нестабильных тестов с повтором упавших.
+
+    Возвращает (прошли после повтора, упали во всех попытках). На код
+    выхода основного прогона не влияет. Тест без записанного результата
+    в своей сессии (процесс не дошёл до sessionfinish) считается упавшим.
+    Повторы пишутся в историю с пометкой retry и не влияют на оценку
+    нестабильности.
+    """
+    remaining = list(nodeids)
+    recovered: List[str] = []
+    for attempt in range(retries + 1):
+        name = f'quarantine-{attempt}'
+        session = uuid.uuid4().hex
+        process, log = _spawn(name, remaining, logdir,
+                              os.path.join(shard_root, name), pytest_args, 1,
+                              session=session, retry=attempt > 0)
+        process.wait()
+        log.close()
+        outcomes = history.session_outcomes(remaining, session)
+        failed = [nodeid for nodeid in remaining
+                  if outcomes.get(nodeid, 'failed') == 'failed']
+        if attempt:
+            recovered.extend(n for n in remaining if n not in failed)
+        print(f"🔁 {name}: {len(remaining)} тестов, упало {len(failed)}")
+        remaining = failed
+        if not remaining:
+            break
+    return recovered, remaining
+
+
+def run(paths: Sequence[str], workers: int, alluredir: str,
+        pytest_args: Sequence[str] = (), fail_fast: bool = False,
+        retries: int = 2, quarantine: bool = True,
+        keyword: Optional[str] = None, markers: Optional[str] = None,
+        logdir: str = '.cache/parallel') -> int:
+    """Запуск тестов на ``workers`` процессах, возвращает код выхода."""
+    os.makedirs(logdir, exist_ok=True)
+    try:
+        nodeids = collect(paths, keyword, markers)
+    except subprocess.CalledProcessError as error:
+        print(f"❌ Ошибка сбора тестов (код {error.returncode}):")
+        print(error.stdout, end='')
+        print(error.stderr, end='', file=sys.stderr)
+        return error.returncode
+    if not nodeids:
+        print("⚠ Тесты не найдены")
+        return 5
+
+    stats = history.stats()
+    flaky = [n for n in nodeids if is_flaky(stats.get(n))] \
+        if quarantine else []
+    main_lane = [n for n in nodeids if n not in flaky]
+    shards = schedule(main_lane, max(1, workers), history.durations(), stats)
+    shard_root = os.path.join(alluredir, 'shards')
+    if fail_fast:
+        pytest_args = ['-x', *pytest_args]
+    processes = []
+    started = time.perf_counter()
+    for index, shard in enumerate(shards):
+        name = f'worker-{index}'
+        process, log = _spawn(name, shard, logdir,
+                              os.path.join(shard_root, name), pytest_args,
+                              len(shards))
+        processes.append((name, process, log))
+        print(f"🚀 {name}: {len(shard)} тестов, первый {shard[0]}")
+
+    codes = _wait(processes, fail_fast)
+    failed = [code for code in codes if code not in (0, 5)]
+
+    if flaky and not (fail_fast and failed):
+        print(f"🧪 Карантин: {len(flaky)} нестабильных тестов")
+        recovered, still_failing = run_quarantine(
+            flaky, logdir, shard_root, pytest_args, retries)
+        for nodeid in recovered:
+            print(f"🟡 прошёл после повтора: {nodeid}")
+        for nodeid in still_failing:
+            print(f"🔴 падает во всех попытках: {nodeid}")
+
+    moved = merge_allure(
+        [os.path.join(shard_root, name) for name in os.listdir(shard_root)]
+        if os.path.isdir(shard_root) else [],
+        alluredir)
+    shutil.rmtree(shard_root, ignore_errors=True)
+    print(f"✅ {len(nodeids)} тестов за {time.perf_counter() - started:.1f}s "
+          f"на {len(shards)} воркерах, файлов Allure: {moved}")
+    return failed[0] if failed else 0
+
+
+def main(argv: Sequence[str] = ()) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--workers', type=int,
+                        default=int(os.getenv('PYTEST_WORKERS',
+                                              os.cpu_count() or 1)))
+    parser.add_argument('--alluredir', default='allure-results')
+    parser.add_argument('--logdir', default=os.getenv(
+        'PARALLEL_LOG_DIR', '.cache/parallel'),
+        help='каталог логов воркеров')
+    parser.add_argument('-k', dest='keyword',
+                        help='выражение -k для отбора тестов')
+    parser.add_argument('-m', dest='markers',
+                        help='выражение -m для отбора тестов')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='остановить все воркеры после первого падения')
+    parser.add_argument('--retries', type=int, default=int(
+        os.getenv('QUARANTINE_RETRIES', '2')),
+        help='повторы упавших тестов в карантине')
+    parser.add_argument('--no-quarantine', action='store_true')
+    parser.add_argument('paths', nargs='*',
+                        default=['tests_test_api.py', 'tests_test_ui.py'])
+    argv = list(argv or sys.argv[1:])
+    pytest_args: List[str] = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, pytest_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    os.makedirs(args.alluredir, exist_ok=True)
+    return run(args.paths, args.workers, args.alluredir, pytest_args,
+               fail_fast=args.fail_fast, retries=args.retries,
+               quarantine=not args.no_quarantine, keyword=args.keyword,
+               markers=args.markers, logdir=args.logdir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
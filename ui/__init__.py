@@ -0,0 +1 @@
+"""Хелперы для UI-тестов Кинопоиска."""
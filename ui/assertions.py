@@ -0,0 +1,93 @@
+import json
+import time
+from typing import Any, Dict, List
+
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+_TEXT_SOURCES = {
+    'text': "document.body ? document.body.innerText : ''",
+    'html': "document.documentElement.outerHTML",
+}
+
+_CONTAINS_SCRIPT = """
+const source = (%s || '').toLowerCase();
+const size = new TextEncoder().encode(
+    document.documentElement.outerHTML).length;
+return [arguments[0].map(n => source.includes(n)), size];
+"""
+
+_COUNT_SCRIPT = """
+try { return document.querySelectorAll(arguments[0]).length; }
+catch (e) { return 0; }
+"""
+
+_ATTRIBUTE_SCRIPT = """
+const values = [];
+for (const el of document.querySelectorAll(arguments[0])) {
+    if (values.length >= arguments[2]) break;
+    values.push(el.getAttribute(arguments[1]));
+}
+return values;
+"""
+
+
+class PageAssert:
+    """Проверки текста и элементов, выполняемые внутри страницы.
+
+    В Python возвращаются только булевы значения и короткие результаты,
+    вместо всего ``page_source``. Счётчики показывают, сколько байт
+    передано и сколько удалось не передавать: размер ``page_source`` в
+    UTF-8 за вычетом реально полученного ответа.
+    """
+
+    def __init__(self, driver: WebDriver) -> None:
+        self.driver = driver
+        self.calls = 0
+        self.bytes_received = 0
+        self.bytes_avoided = 0
+        self.last_bytes = 0
+        self.elapsed = 0.0
+
+    def _run(self, script: str, *args: Any) -> Any:
+        started = time.perf_counter()
+        result = self.driver.execute_script(script, *args)
+        self.elapsed += time.perf_counter() - started
+        self.calls += 1
+        self.last_bytes = len(
+            json.dumps(result, ensure_ascii=False, default=str)
+            .encode('utf-8'))
+        self.bytes_received += self.last_bytes
+        return result
+
+    def contains(self, *needles: str, source: str = 'text') -> Dict[str, bool]:
+        """Какие из строк встречаются на странице (без учёта регистра)."""
+        script = _CONTAINS_SCRIPT % _TEXT_SOURCES[source]
+        found, page_size = self._run(script, [n.lower() for n in needles])
+        self.bytes_avoided += max(0, page_size - self.last_bytes)
+        return dict(zip(needles, found))
+
+    def contains_any(self, *needles: str, source: str = 'text') -> bool:
+        """Хотя бы одна из строк есть на странице."""
+        return any(self.contains(*needles, source=source).values())
+
+    def contains_all(self, *needles: str, source: str = 'text') -> bool:
+        """Все строки есть на странице."""
+        return all(self.contains(*needles, source=source).values())
+
+    def count(self, selector: str) -> int:
+        """Количество элементов по CSS-селектору."""
+        return self._run(_COUNT_SCRIPT, selector)
+
+    def attribute(self, selector: str, name: str,
+                  limit: int = 20) -> List[Any]:
+        """Значения атрибута у первых limit элементов."""
+        return self._run(_ATTRIBUTE_SCRIPT, selector, name, limit)
+
+    def report(self) -> str:
+        """Сводка по объёму переданных данных и времени проверок."""
+        return (
+            f"Проверок в браузере: {self.calls}\n"
+            f"Получено байт: {self.bytes_received}\n"
+            f"Не передано байт (page_source): {self.bytes_avoided}\n"
+            f"Время: {self.elapsed:.3f}s"
+        )
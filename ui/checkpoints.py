@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from ui.state import capture_state, remove_script, restore_state
+from ui.waits import Waiter
+
+_SCROLL_SCRIPT = "return [window.scrollX, window.scrollY];"
+
+
+class CheckpointStore:
+    """Снимки состояния после общих начал тестов, одни на воркер.
+
+    Начало (prefix) выполняется один раз; его стоимость запоминается, а
+    каждое восстановление вместо повтора записывается как сэкономленное
+    время.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkpoints: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.checkpoints.get(name)
+
+    def put(self, name: str, checkpoint: Dict[str, Any]) -> None:
+        with self._lock:
+            self.checkpoints[name] = checkpoint
+            self.stats.setdefault(name, {'runs': 0, 'restores': 0,
+                                         'saved_s': 0.0})
+            self.stats[name]['runs'] += 1
+
+    def restored(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            stats = self.stats[name]
+            stats['restores'] += 1
+            stats['saved_s'] += self.checkpoints[name]['cost'] - elapsed
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self.checkpoints.pop(name, None)
+
+    def report(self) -> str:
+        """Сэкономленное время по каждому снимку."""
+        lines = []
+        with self._lock:
+            for name, stats in sorted(self.stats.items()):
+                cost = self.checkpoints.get(name, {}).get('cost', 0.0)
+                lines.append(
+                    f"{name}: выполнено {stats['runs']}, "
+                    f"восстановлено {stats['restores']}, "
+                    f"стоимость {cost:.2f}s, "
+                    f"сэкономлено {stats['saved_s']:.2f}s")
+        return "\n".join(lines) or "снимков нет"
+
+
+class FlowCheckpoints:
+    """Выполнение именованного начала теста или восстановление его
+    результата: URL, cookies, storage и прокрутка.
+
+        checkpoints.run('main_page', lambda: open_main_page(...))
+
+    Восстанавливается только то, что переживает переход по URL;
+    состояние, которое живёт в DOM (открытые попапы, фокус), нужно
+    делать уже после run().
+    """
+
+    def __init__(self, store: CheckpointStore, driver: WebDriver,
+                 waiter: Optional[Waiter] = None) -> None:
+        self.store = store
+        self.driver = driver
+        self.waiter = waiter or Waiter(driver)
+        self.restored: List[str] = []
+        self._script_ids: List[str] = []
+
+    def _capture(self, cost: float) -> Dict[str, Any]:
+        checkpoint = capture_state(self.driver)
+        checkpoint['url'] = self.driver.current_url
+        checkpoint['scroll'] = self.driver.execute_script(_SCROLL_SCRIPT)
+        checkpoint['cost'] = cost
+        return checkpoint
+
+    def _restore(self, checkpoint: Dict[str, Any]) -> None:
+        self._script_ids.append(restore_state(self.driver, checkpoint))
+        self.driver.get(checkpoint['url'])
+        # То же ожидание, что и в начале теста: проверки после run() должны
+        # видеть такую же успокоившуюся страницу, как при снятии снимка
+        self.waiter.page_ready()
+        x, y = checkpoint['scroll']
+        if x or y:
+            self.driver.execute_script(
+                "window.scrollTo(arguments[0], arguments[1]);", x, y)
+
+    def run(self, name: str, prefix: Callable[[], Any],
+            valid: Optional[Callable[[], bool]] = None) -> bool:
+        """Восстановление снимка ``name`` или выполнение prefix со
+        снятием снимка. Возвращает True, если снимок восстановлен.
+
+        ``valid`` проверяет страницу после восстановления; если проверка
+        не прошла, снимок сбрасывается и начало выполняется заново.
+        """
+        checkpoint = self.store.get(name)
+        started = time.perf_counter()
+        if checkpoint is not None:
+            self._restore(checkpoint)
+            if valid is None or valid():
+                self.store.restored(name, time.perf_counter() - started)
+                self.restored.append(name)
+                return True
+            self.store.invalidate(name)
+            started = time.perf_counter()
+        prefix()
+        self.store.put(name, self._capture(time.perf_counter() - started))
+        return False
+
+    def release(self) -> None:
+        """Удаление скриптов восстановления перед возвратом браузера."""
+        for script_id in self._script_ids:
+            remove_script(self.driver, script_id)
+        self._script_ids.clear()
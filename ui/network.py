@@ -0,0 +1,132 @@
+import json
+from typing import Any, Dict, Iterable, List
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+# Шаблоны URL для Network.setBlockedURLs по категориям
+CATEGORIES: Dict[str, List[str]] = {
+    'images': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif',
+               '*.svg', '*avatars.mds.yandex.net*'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.ts', '*strm.yandex.ru*'],
+    'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf'],
+    'trackers': ['*mc.yandex.ru*', '*an.yandex.ru*', '*yandex.ru/ads*',
+                 '*adfox*', '*googletagmanager.com*',
+                 '*google-analytics.com*', '*doubleclick.net*'],
+}
+
+PROFILES: Dict[str, List[str]] = {
+    'full': [],
+    'no-trackers': ['trackers'],
+    'no-media': ['images', 'media', 'fonts'],
+    'text-only': ['images', 'media', 'fonts', 'trackers'],
+}
+
+
+def blocked_patterns(profile: str, allow: Iterable[str] = (),
+                     block: Iterable[str] = ()) -> List[str]:
+    """Шаблоны блокировки для профиля.
+
+    ``allow`` убирает категории из профиля, ``block`` добавляет свои шаблоны.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный сетевой профиль: {profile}")
+    allowed = set(allow)
+    patterns = [
+        pattern
+        for category in PROFILES[profile] if category not in allowed
+        for pattern in CATEGORIES[category]
+    ]
+    patterns.extend(block)
+    return patterns
+
+
+def timings_from_log(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Сборка HAR-подобного журнала запросов из performance-лога Chrome."""
+    requests: Dict[str, Dict[str, Any]] = {}
+    for entry in entries:
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method', '')
+        params = message.get('params', {})
+        request_id = params.get('requestId')
+        if not request_id:
+            continue
+        if method == 'Network.requestWillBeSent':
+            requests[request_id] = {
+                'url': params['request']['url'][:300],
+                'type': params.get('type', ''),
+                'start': params['timestamp'],
+                'status': None,
+                'bytes': 0,
+                'duration_ms': None,
+                'blocked': False,
+            }
+            continue
+        item = requests.get(request_id)
+        if item is None:
+            continue
+        if method == 'Network.responseReceived':
+            item['status'] = params['response'].get('status')
+        elif method == 'Network.loadingFinished':
+            item['bytes'] = params.get('encodedDataLength', 0)
+            item['duration_ms'] = round(
+                (params['timestamp'] - item['start']) * 1000, 1)
+        elif method == 'Network.loadingFailed':
+            item['blocked'] = bool(params.get('blockedReason'))
+            item['error'] = params.get('errorText')
+            item['duration_ms'] = round(
+                (params['timestamp'] - item['start']) * 1000, 1)
+    return list(requests.values())
+
+
+def summarize(timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Итоги по журналу запросов."""
+    finished = [t for t in timings if t['duration_ms'] is not None]
+    span = 0.0
+    if finished:
+        start = min(t['start'] for t in finished)
+        end = max(t['start'] + t['duration_ms'] / 1000 for t in finished)
+        span = round((end - start) * 1000, 1)
+    return {
+        'requests': len(timings),
+        'blocked': sum(1 for t in timings if t['blocked']),
+        'bytes': sum(t['bytes'] for t in timings),
+        'span_ms': span,
+    }
+
+
+class NetworkPolicy:
+    """Блокировка тяжёлых ресурсов через CDP и журнал сетевых запросов."""
+
+    def __init__(self, driver: WebDriver, profile: str = 'full',
+                 allow: Iterable[str] = (), block: Iterable[str] = ()) -> None:
+        self.driver = driver
+        self.profile = profile
+        self.patterns = blocked_patterns(profile, allow, block)
+
+    def _drain_log(self) -> List[Dict[str, Any]]:
+        try:
+            return self.driver.get_log('performance')
+        except WebDriverException:
+            return []
+
+    def apply(self) -> None:
+        """Включение профиля и очистка журнала от прошлых запросов."""
+        self._drain_log()
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd(
+            'Network.setBlockedURLs', {'urls': self.patterns})
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Журнал запросов с момента apply()."""
+        return timings_from_log(self._drain_log())
+
+    def clear(self) -> None:
+        """Снятие блокировок перед возвратом браузера в пул."""
+        try:
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+        except WebDriverException:
+            pass
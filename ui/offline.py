@@ -0,0 +1,382 @@
+"""Офлайн-снимки страниц для UI-тестов.
+
+Отрисованный DOM и все загруженные ресурсы страницы сохраняются в
+хранилище по хешу содержимого, локальный сервер отдаёт их с заменой
+адресов на свой, а фикстура ``browser`` перенаправляет на него переходы.
+
+    python -m ui.offline capture --store .cache/offline
+    OFFLINE_SNAPSHOTS=.cache/offline pytest tests_test_ui.py
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import (Any, Callable, Dict, Iterable, List, Optional, Sequence,
+                    Set, Tuple)
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from ui.pool import launch_chrome, restore_attribute
+
+# Страницы, которые открывают тесты tests_test_ui.py
+PAGES = (
+    "https://www.kinopoisk.ru/",
+    "https://www.kinopoisk.ru/film/468005/",
+    "https://www.kinopoisk.ru/lists/movies/movies-in-cinema/",
+    "https://www.kinopoisk.ru/s/школа%202010/",
+)
+
+# Типы, в которых заменяются адреса на адрес локального сервера
+_TEXT_TYPES = ('text/', 'application/javascript', 'application/json',
+               'application/x-javascript', 'image/svg+xml')
+
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script\s*>',
+                        re.IGNORECASE | re.DOTALL)
+
+
+def normalize(url: str) -> str:
+    """URL без фрагмента - ключ ресурса в хранилище."""
+    return url.split('#', 1)[0]
+
+
+class SnapshotStore:
+    """Хранилище ресурсов по sha256 содержимого и индекс URL -> ресурс.
+
+    Одинаковые файлы на разных страницах (скрипты, шрифты) хранятся один
+    раз.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.index_path = os.path.join(root, 'index.json')
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def put(self, url: str, body: bytes, content_type: str) -> str:
+        """Сохранение ресурса; возвращает хеш содержимого."""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        with self._lock:
+            self.index[normalize(url)] = {'sha256': digest,
+                                          'type': content_type}
+        return digest
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """Содержимое и тип ресурса; без совпадения query - по пути."""
+        url = normalize(url)
+        entry = self.index.get(url) or self.index.get(url.split('?', 1)[0])
+        if entry is None:
+            return None
+        with open(self._object_path(entry['sha256']), 'rb') as f:
+            return f.read(), entry['type']
+
+    def hosts(self) -> List[str]:
+        """Хосты, ресурсы которых есть в хранилище."""
+        return sorted({urlsplit(url).netloc for url in self.index})
+
+    def save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.index_path)
+
+
+def local_url(url: str, base: str) -> str:
+    """https://host/path?q -> {base}/host/path?q"""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ''
+    return f"{base}/{parts.netloc}{parts.path or '/'}{query}"
+
+
+def rewriter(hosts: Iterable[str], base: str) -> Callable[[str], str]:
+    """Замена абсолютных адресов известных хостов на адрес сервера.
+
+    Учитываются ``https://``, ``//`` и экранированные в JSON ``\\/\\/``.
+    """
+    names = '|'.join(re.escape(host) for host in
+                     sorted(hosts, key=len, reverse=True))
+    pattern = re.compile(
+        r'(?:https?:)?(?://|\\/\\/)(' + names + r')(?=[/\\"\'\s?#)]|$)')
+    replacement = base.replace('\\', '\\\\') + r'/\1'
+
+    def rewrite(text: str) -> str:
+        return pattern.sub(replacement, text) if names else text
+
+    return rewrite
+
+
+def capture_page(driver: WebDriver, store: SnapshotStore, url: str,
+                 keep_scripts: bool = False) -> int:
+    """Сохранение отрисованного DOM и загруженных ресурсов страницы.
+
+    Скрипты из документа убираются: DOM уже отрисован, а повторный
+    запуск скриптов без сети его только ломает. Возвращает число
+    сохранённых ресурсов.
+    """
+    from ui.waits import Waiter
+
+    driver.execute_cdp_cmd('Page.enable', {})
+    driver.get(url)
+    Waiter(driver).page_ready()
+    saved = 0
+
+    def walk(tree: Dict[str, Any]) -> None:
+        nonlocal saved
+        frame_id = tree['frame']['id']
+        for resource in tree.get('resources', []):
+            if resource.get('failed') or resource.get('canceled'):
+                continue
+            try:
+                content = driver.execute_cdp_cmd(
+                    'Page.getResourceContent',
+                    {'frameId': frame_id, 'url': resource['url']})
+            except WebDriverException:
+                continue
+            body = (base64.b64decode(content['content'])
+                    if content.get('base64Encoded')
+                    else content['content'].encode('utf-8'))
+            store.put(resource['url'], body, resource['mimeType'])
+            saved += 1
+        for child in tree.get('childFrames', []):
+            walk(child)
+
+    walk(driver.execute_cdp_cmd('Page.getResourceTree', {})['frameTree'])
+
+    html = driver.execute_script(
+        "return '<!DOCTYPE html>' + document.documentElement.outerHTML;")
+    if not keep_scripts:
+        html = _SCRIPT_RE.sub('', html)
+    body = html.encode('utf-8')
+    for address in {url, driver.current_url}:
+        store.put(address, body, 'text/html; charset=utf-8')
+    return saved + 1
+
+
+class OfflineRedirect:
+    """Перенаправление driver.get на локальный сервер снимков."""
+
+    def __init__(self, driver: WebDriver, base: str,
+                 hosts: Iterable[str]) -> None:
+        self.driver = driver
+        self.base = base
+        self.hosts = set(hosts)
+        self._previous: Any = None
+        self._wrapper: Any = None
+
+    def install(self) -> None:
+        # Перехват driver.get может уже стоять (PageMetrics): запоминаем
+        # его, чтобы при снятии вернуть ровно то, что заменили
+        self._previous = self.driver.__dict__.get('get')
+        original = self.driver.get
+
+        def get(url: str) -> None:
+            if urlsplit(url).netloc in self.hosts:
+                url = local_url(url, self.base)
+            original(url)
+
+        self._wrapper = get
+        self.driver.get = get
+
+    def release(self) -> None:
+        restore_attribute(self.driver, 'get', self._wrapper, self._previous)
+
+
+class SnapshotServer:
+    """HTTP-сервер снимков: ``/{host}/{path}`` -> ``https://{host}/{path}``.
+
+    Адреса от корня (``/static/app.css``) достраиваются по хосту из
+    Referer, поэтому в содержимом заменяются только абсолютные адреса.
+    """
+
+    def __init__(self, store: SnapshotStore) -> None:
+        self.store = store
+        self.hosts = set(store.hosts())
+        self.base = ''
+        self.requests = 0
+        self.misses = 0
+        self._rewrite: Optional[Callable[[str], str]] = None
+        self._cache: Dict[str, Tuple[bytes, str]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Открытые соединения: keep-alive клиентов закрываем сами, иначе
+        # wait_closed() (Python 3.12.1+) ждёт, пока их закроет клиент
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    def resolve(self, target: str, referer: str = '') -> Optional[str]:
+        """Исходный URL ресурса по пути запроса."""
+        path = target.lstrip('/')
+        host, _, rest = path.partition('/')
+        if host not in self.hosts:
+            ref_host = urlsplit(referer).path.lstrip('/').split('/', 1)[0]
+            if ref_host not in self.hosts:
+                return None
+            host, rest = ref_host, path
+        return f"https://{host}/{rest}"
+
+    def route(self, target: str,
+              referer: str = '') -> Tuple[int, bytes, str]:
+        url = self.resolve(target, referer)
+        if url is None:
+            return 404, b'', 'text/plain'
+        if url in self._cache:
+            body, content_type = self._cache[url]
+            return 200, body, content_type
+        found = self.store.get(url)
+        if found is None:
+            self.misses += 1
+            return 404, b'', 'text/plain'
+        body, content_type = found
+        if self._rewrite and content_type.startswith(_TEXT_TYPES):
+            body = self._rewrite(body.decode('utf-8', 'replace')).encode(
+                'utf-8')
+        self._cache[url] = (body, content_type)
+        return 200, body, content_type
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode('latin-1').split(' ', 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                status, body, content_type = self.route(
+                    target, headers.get('referer', ''))
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                reason = 'OK' if status == 200 else 'Not Found'
+                head = [
+                    f"HTTP/1.1 {status} {reason}",
+                    f"Content-Type: {content_type}",
+                    f"Content-Length: {len(body)}",
+                    "Cache-Control: max-age=3600",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1')
+                             + (body if method != 'HEAD' else b''))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """Запуск сервера, возвращает фактический порт."""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.base = f"http://{host}:{port}"
+        self._rewrite = rewriter(self.hosts, self.base)
+        return port
+
+    def run_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Запуск в фоновом потоке, возвращает базовый URL."""
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        future = asyncio.run_coroutine_threadsafe(self.start(host, port), loop)
+        threading.Thread(target=loop.run_forever, daemon=True,
+                         name='snapshot-server').start()
+        return f"http://{host}:{future.result(timeout=10)}"
+
+    def stop(self) -> None:
+        """Остановка сервера, запущенного через run_in_thread."""
+        if self._loop is None or self._server is None:
+            return
+        server, loop = self._server, self._loop
+
+        async def shutdown() -> None:
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+
+    def report(self) -> str:
+        return (f"офлайн-снимки: {len(self.store.index)} ресурсов, "
+                f"запросов {self.requests}, не найдено {self.misses}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('command', choices=('capture', 'serve'))
+    parser.add_argument('urls', nargs='*',
+                        help='страницы для capture (по умолчанию PAGES)')
+    parser.add_argument('--store', default=os.getenv(
+        'OFFLINE_SNAPSHOTS', '.cache/offline'))
+    parser.add_argument('--state', default=os.getenv(
+        'STATE_SNAPSHOT', '.cache/session_state.json'),
+        help='снимок cookies (ui.state), подставляется перед capture')
+    parser.add_argument('--keep-scripts', action='store_true')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    if args.command == 'capture':
+        from ui.state import SessionState, StateStore
+
+        driver = launch_chrome()
+        try:
+            SessionState(StateStore(args.state, float('inf')),
+                         driver).restore()
+            for url in args.urls or PAGES:
+                count = capture_page(driver, store, url, args.keep_scripts)
+                print(f"📥 {url}: {count} ресурсов")
+        finally:
+            driver.quit()
+            store.save()
+        return
+
+    server = SnapshotServer(store)
+
+    async def serve() -> None:
+        port = await server.start(args.host, args.port)
+        print(f"🗄 Снимки: http://{args.host}:{port}/www.kinopoisk.ru/ "
+              f"({len(store.index)} ресурсов)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from ui.waits import install_network_hook
+from ui.watchdog import MemoryWatchdog
+
+IMPLICIT_WAIT = 10
+
+
+def chrome_options() -> Options:
+    """Настройки Chrome, общие для всех браузеров пула."""
+    options = Options()
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    # Сетевые события для журнала запросов (ui.network)
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.add_experimental_option(
+        'perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return options
+
+
+def launch_chrome() -> WebDriver:
+    """Запуск нового экземпляра Chrome со скрытием признаков автоматизации."""
+    driver = webdriver.Chrome(options=chrome_options())
+    driver.execute_script(
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    )
+    install_network_hook(driver)
+    driver.implicitly_wait(IMPLICIT_WAIT)
+    return driver
+
+
+def restore_attribute(obj: Any, name: str, wrapper: Any,
+                      previous: Any) -> None:
+    """Снятие перехвата атрибута экземпляра (например, driver.get) перед
+    возвратом браузера в пул: только если сверху всё ещё наша обёртка,
+    и с возвратом того, что было до неё."""
+    if obj.__dict__.get(name) is not wrapper:
+        return
+    if previous is None:
+        del obj.__dict__[name]
+    else:
+        setattr(obj, name, previous)
+
+
+class PooledDriver:
+    """Браузер из пула и счётчик выдач."""
+
+    def __init__(self, driver: WebDriver) -> None:
+        self.driver = driver
+        self.leases = 0
+
+
+class BrowserPool:
+    """Пул «прогретых» браузеров, которые выдаются тестам и сбрасываются
+    между выдачами.
+
+    Браузер пересоздаётся после ``max_leases`` выдач или если он перестал
+    отвечать; со сторожем (``watchdog``) - ещё и при превышении памяти.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_leases: int = 20,
+        factory: Callable[[], WebDriver] = launch_chrome,
+        watchdog: Optional[MemoryWatchdog] = None,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_leases = max(1, max_leases)
+        self.factory = factory
+        self.watchdog = watchdog
+        self._idle: "queue.Queue[PooledDriver]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.timings: Dict[str, List[float]] = {
+            'launch': [], 'lease': [], 'reset': [], 'quit': []
+        }
+        self.recycled = 0
+        self.crashed = 0
+
+    def _record(self, name: str, started: float) -> None:
+        with self._lock:
+            self.timings[name].append(time.perf_counter() - started)
+
+    def _launch(self) -> PooledDriver:
+        started = time.perf_counter()
+        driver = self.factory()
+        self._record('launch', started)
+        if self.watchdog is not None:
+            self.watchdog.watch(driver)
+        return PooledDriver(driver)
+
+    def _quit(self, item: PooledDriver, kill: bool = False) -> None:
+        started = time.perf_counter()
+        processes: list = []
+        if self.watchdog is not None:
+            if kill:
+                self.watchdog.kill(item.driver)
+            processes = self.watchdog.unwatch(item.driver)
+        try:
+            item.driver.quit()
+        except Exception:
+            pass
+        if self.watchdog is not None:
+            self.watchdog.reap(processes)
+        self._record('quit', started)
+        with self._lock:
+            self._created -= 1
+
+    def _acquire(self) -> PooledDriver:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_launch = self._created < self.size
+            if can_launch:
+                self._created += 1
+        if can_launch:
+            try:
+                return self._launch()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    @staticmethod
+    def is_alive(driver: WebDriver) -> bool:
+        """Проверка, что браузер ещё отвечает на команды."""
+        try:
+            driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def reset(self, driver: WebDriver) -> None:
+        """Сброс состояния браузера: вкладки, cookies, storage,
+        неявное ожидание."""
+        started = time.perf_counter()
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script(
+                "try { window.localStorage.clear(); } catch (e) {}"
+                "try { window.sessionStorage.clear(); } catch (e) {}"
+            )
+        except WebDriverException:
+            pass
+        # delete_all_cookies чистит только текущий домен, CDP - все
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get('about:blank')
+        driver.implicitly_wait(IMPLICIT_WAIT)
+        self._record('reset', started)
+
+    def _release(self, item: PooledDriver) -> None:
+        item.leases += 1
+        if self.watchdog is not None:
+            reason = self.watchdog.check(item.driver)
+            if reason is not None:
+                with self._lock:
+                    self.recycled += 1
+                self._quit(item, kill=reason == 'unresponsive')
+                return
+        if not self.is_alive(item.driver):
+            with self._lock:
+                self.crashed += 1
+            self._quit(item)
+            return
+        if item.leases >= self.max_leases or self._closed:
+            with self._lock:
+                self.recycled += 1
+            self._quit(item)
+            return
+        try:
+            self.reset(item.driver)
+        except WebDriverException:
+            with self._lock:
+                self.crashed += 1
+            self._quit(item)
+            return
+        self._idle.put(item)
+
+    @contextmanager
+    def lease(self) -> Generator[WebDriver, None, None]:
+        """Выдача браузера из пула на время теста."""
+        started = time.perf_counter()
+        item = self._acquire()
+        self._record('lease', started)
+        try:
+            yield item.driver
+        finally:
+            self._release(item)
+
+    def close(self) -> None:
+        """Закрытие всех свободных браузеров пула."""
+        self._closed = True
+        while True:
+            try:
+                item = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(item)
+        if self.watchdog is not None:
+            self.watchdog.close()
+
+    def stats(self) -> Dict[str, float]:
+        """Суммарная статистика по запускам, выдачам и сбросам."""
+        result: Dict[str, float] = {
+            'recycled': self.recycled, 'crashed': self.crashed
+        }
+        for name, values in self.timings.items():
+            result[f'{name}_count'] = len(values)
+            result[f'{name}_total_s'] = round(sum(values), 3)
+        return result
+
+    def report(self, launch_estimate: Optional[float] = None) -> str:
+        """Текстовый отчёт по пулу для вывода в консоль."""
+        stats = self.stats()
+        launches = self.timings['launch']
+        avg_launch = launch_estimate or (
+            sum(launches) / len(launches) if launches else 0.0)
+        leases = len(self.timings['lease'])
+        saved = avg_launch * (leases - len(launches)) - stats['reset_total_s']
+        lines = [f"{key}: {value}" for key, value in stats.items()]
+        lines.append(f"saved_estimate_s: {round(saved, 3)}")
+        return "\n".join(lines)
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from selenium.webdriver.chrome.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+# Проверка всего списка селекторов за один вызов execute_script
+_PROBE_SCRIPT = """
+const selectors = arguments[0];
+const stopAtFirst = arguments[1];
+const limit = arguments[2];
+const seen = new Set();
+const result = [];
+for (const selector of selectors) {
+    let nodes;
+    try { nodes = document.querySelectorAll(selector); }
+    catch (e) { continue; }
+    let visibleFound = false;
+    let taken = 0;
+    for (const el of nodes) {
+        if (taken >= limit) break;
+        if (seen.has(el)) continue;
+        seen.add(el);
+        taken++;
+        const r = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        const visible = r.width > 0 && r.height > 0 &&
+            style.visibility !== 'hidden' && style.display !== 'none';
+        visibleFound = visibleFound || visible;
+        result.push([selector, el, visible,
+                     (el.innerText || '').trim().slice(0, 200)]);
+    }
+    if (stopAtFirst && visibleFound) break;
+}
+return result;
+"""
+
+
+class Match:
+    """Элемент, найденный одним из селекторов."""
+
+    def __init__(self, selector: str, element: WebElement, visible: bool,
+                 text: str) -> None:
+        self.selector = selector
+        self.element = element
+        self.visible = visible
+        self.text = text
+
+
+class SelectorCache:
+    """Файл с селекторами, которые сработали в прошлый раз, по страницам."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, str] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+
+    @staticmethod
+    def key(page: str, name: str) -> str:
+        return f"{page}#{name}"
+
+    def get(self, page: str, name: str) -> Optional[str]:
+        return self._data.get(self.key(page, name))
+
+    def remember(self, page: str, name: str, selector: str) -> None:
+        with self._lock:
+            self._data[self.key(page, name)] = selector
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+
+
+class SelectorProbe:
+    """Поиск элементов по списку селекторов за один запрос к браузеру.
+
+    Селектор, сработавший в прошлый раз на этой странице, проверяется
+    первым.
+    """
+
+    def __init__(self, driver: WebDriver,
+                 cache: Optional[SelectorCache] = None) -> None:
+        self.driver = driver
+        self.cache = cache
+
+    def page_key(self) -> str:
+        url = urlparse(self.driver.current_url)
+        return f"{url.netloc}{url.path}"
+
+    def _ordered(self, selectors: Sequence[str], page: str,
+                 name: str) -> List[str]:
+        ordered = list(selectors)
+        cached = self.cache.get(page, name) if self.cache else None
+        if cached in ordered:
+            ordered.remove(cached)
+            ordered.insert(0, cached)
+        return ordered
+
+    def probe(
+        self,
+        selectors: Sequence[str],
+        name: str,
+        page: Optional[str] = None,
+        stop_at_first: bool = False,
+        limit: int = 50,
+    ) -> List[Match]:
+        """Все совпадения по селекторам, без повторов одного элемента."""
+        page = page or self.page_key()
+        ordered = self._ordered(selectors, page, name)
+        rows = self.driver.execute_script(
+            _PROBE_SCRIPT, ordered, stop_at_first, limit)
+        matches = [Match(*row) for row in rows]
+
+        if self.cache:
+            for match in matches:
+                if match.visible:
+                    self.cache.remember(page, name, match.selector)
+                    break
+        return matches
+
+    def first_visible(
+        self, selectors: Sequence[str], name: str, page: Optional[str] = None
+    ) -> Optional[Match]:
+        """Первый видимый элемент по списку селекторов."""
+        matches = self.probe(selectors, name, page, stop_at_first=True)
+        return next((m for m in matches if m.visible), None)
@@ -0,0 +1,139 @@
+import io
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+import allure
+from PIL import Image
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+MODES = ('always', 'failure', 'ring')
+
+
+def dhash(image: Image.Image, size: int = 8) -> int:
+    """Перцептивный хэш (difference hash) изображения."""
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def process_frame(png: bytes, max_width: int) -> Tuple[bytes, int]:
+    """Уменьшение кадра, пересжатие в PNG и расчёт хэша."""
+    with Image.open(io.BytesIO(png)) as image:
+        image = image.convert('RGB')
+        if image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.BILINEAR)
+        frame_hash = dhash(image)
+        out = io.BytesIO()
+        image.save(out, format='PNG', optimize=True)
+    return out.getvalue(), frame_hash
+
+
+class ScreenshotRecorder:
+    """Скриншоты одного теста.
+
+    В режиме ``always`` кадры обрабатываются в фоне сразу. В режиме
+    ``ring`` в памяти хранятся последние ``ring_size`` кадров, которые
+    попадают в отчёт только при падении теста. В режиме ``failure``
+    промежуточные снимки не делаются вовсе: остаётся только финальный
+    кадр упавшего теста.
+    """
+
+    def __init__(self, service: 'ScreenshotService') -> None:
+        self.service = service
+        self.frames: Deque[Tuple[str, bytes]] = deque(
+            maxlen=service.ring_size)
+        self.pending: List[Tuple[str, Future]] = []
+
+    def capture(self, driver: WebDriver, name: str,
+                final: bool = False) -> None:
+        """Снимок экрана; обработка и вложение в отчёт - позже.
+
+        ``final`` - финальный кадр упавшего теста, снимается в любом
+        режиме.
+        """
+        if self.service.mode == 'failure' and not final:
+            return
+        try:
+            png = driver.get_screenshot_as_png()
+        except WebDriverException:
+            return
+        if self.service.mode == 'always' or final:
+            self.pending.append((name, self.service.submit(png)))
+        else:
+            self.frames.append((name, png))
+
+    def finish(self, failed: bool) -> None:
+        """Вложение кадров в Allure с отбрасыванием похожих.
+
+        Ожидаются только кадры, которые попадают в отчёт: в режиме ring
+        у прошедшего теста кадры отбрасываются без обработки.
+        """
+        if failed:
+            # Кадры из памяти идут в отчёт раньше финального
+            self.pending[:0] = [(name, self.service.submit(png))
+                                for name, png in self.frames]
+        self.frames.clear()
+
+        last_hash: Optional[int] = None
+        for name, future in self.pending:
+            data, frame_hash = future.result()
+            if (last_hash is not None and
+                    hamming(frame_hash, last_hash) <= self.service.threshold):
+                self.service.skipped += 1
+                continue
+            last_hash = frame_hash
+            self.service.attached += 1
+            self.service.bytes_attached += len(data)
+            allure.attach(data, name=name,
+                          attachment_type=allure.attachment_type.PNG)
+        self.pending.clear()
+
+
+class ScreenshotService:
+    """Фоновая обработка скриншотов для всех тестов сессии."""
+
+    def __init__(
+        self,
+        mode: str = 'failure',
+        ring_size: int = 5,
+        max_width: int = 960,
+        threshold: int = 4,
+        workers: int = 2,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим скриншотов: {mode}")
+        self.mode = mode
+        self.ring_size = max(1, ring_size)
+        self.max_width = max_width
+        self.threshold = threshold
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='screenshots')
+        self.attached = 0
+        self.skipped = 0
+        self.bytes_attached = 0
+
+    def submit(self, png: bytes) -> Future:
+        return self.executor.submit(process_frame, png, self.max_width)
+
+    def for_test(self) -> ScreenshotRecorder:
+        return ScreenshotRecorder(self)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def report(self) -> str:
+        return (f"Вложено: {self.attached}, пропущено похожих: "
+                f"{self.skipped}, байт: {self.bytes_attached}")
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+# Поля, которые принимает Storage.setCookies
+_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly',
+                  'sameSite', 'expires')
+
+_CAPTURE_SCRIPT = """
+const dump = s => { const r = []; for (let i = 0; i < s.length; i++) {
+    const k = s.key(i); r.push([k, s.getItem(k)]); } return r; };
+return [location.origin, dump(window.localStorage),
+        dump(window.sessionStorage)];
+"""
+
+_RESTORE_TEMPLATE = """
+(function() {
+    if (location.origin !== %s) return;
+    const fill = (storage, items) => {
+        for (const [k, v] of items) {
+            if (storage.getItem(k) === null) storage.setItem(k, v);
+        }
+    };
+    try { fill(window.localStorage, %s); } catch (e) {}
+    try { fill(window.sessionStorage, %s); } catch (e) {}
+})();
+"""
+
+
+def capture_state(driver: WebDriver) -> Dict[str, Any]:
+    """Cookies, localStorage и sessionStorage текущей страницы."""
+    cookies: List[Dict[str, Any]] = driver.execute_cdp_cmd(
+        'Storage.getCookies', {}).get('cookies', [])
+    origin, local, session = driver.execute_script(_CAPTURE_SCRIPT)
+    return {
+        'created': time.time(),
+        'origin': origin,
+        'cookies': [
+            {key: c[key] for key in _COOKIE_FIELDS
+             if key in c and not (key == 'expires' and c[key] < 0)}
+            for c in cookies
+        ],
+        'local': local,
+        'session': session,
+    }
+
+
+def restore_state(driver: WebDriver, snapshot: Dict[str, Any]) -> str:
+    """Подстановка снимка до следующего перехода; возвращает идентификатор
+    скрипта восстановления storage."""
+    driver.execute_cdp_cmd(
+        'Storage.setCookies', {'cookies': snapshot['cookies']})
+    source = _RESTORE_TEMPLATE % (
+        json.dumps(snapshot['origin']),
+        json.dumps(snapshot['local'], ensure_ascii=False),
+        json.dumps(snapshot['session'], ensure_ascii=False),
+    )
+    result = driver.execute_cdp_cmd(
+        'Page.addScriptToEvaluateOnNewDocument', {'source': source})
+    return result.get('identifier')
+
+
+def remove_script(driver: WebDriver, script_id: str) -> None:
+    """Удаление скрипта восстановления (браузер мог уже закрыться)."""
+    try:
+        driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument',
+                               {'identifier': script_id})
+    except WebDriverException:
+        pass
+
+
+class StateStore:
+    """Снимок cookies и storage после согласия с cookies, общий для сессии.
+
+    Хранится в файле, чтобы переживать перезапуски; старше ``max_age``
+    секунд считается устаревшим.
+    """
+
+    def __init__(self, path: str, max_age: float) -> None:
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.snapshot = json.load(f)
+            except (OSError, ValueError):
+                self.snapshot = None
+
+    def fresh(self) -> Optional[Dict[str, Any]]:
+        """Снимок, если он есть и не устарел."""
+        snapshot = self.snapshot
+        if snapshot and time.time() - snapshot['created'] <= self.max_age:
+            return snapshot
+        return None
+
+    def save(self, snapshot: Dict[str, Any]) -> None:
+        with self._lock:
+            self.snapshot = snapshot
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.snapshot = None
+            self.stale += 1
+
+    def report(self) -> str:
+        return (f"Снимок состояния: попаданий {self.hits}, "
+                f"промахов {self.misses}, устаревших {self.stale}")
+
+
+class SessionState:
+    """Восстановление снимка состояния в браузере теста."""
+
+    def __init__(self, store: StateStore, driver: WebDriver) -> None:
+        self.store = store
+        self.driver = driver
+        self.restored = False
+        self._script_id: Optional[str] = None
+
+    def restore(self) -> bool:
+        """Подстановка cookies и storage до первого перехода."""
+        snapshot = self.store.fresh()
+        if snapshot is None:
+            self.store.misses += 1
+            return False
+        self._script_id = restore_state(self.driver, snapshot)
+        self.store.hits += 1
+        self.restored = True
+        return True
+
+    def capture(self) -> None:
+        """Сохранение текущего состояния браузера как нового снимка."""
+        self.store.save(capture_state(self.driver))
+
+    def mark_stale(self) -> None:
+        """Баннер появился несмотря на снимок - снимок устарел."""
+        self.store.invalidate()
+        self.restored = False
+
+    def release(self) -> None:
+        """Удаление скрипта восстановления перед возвратом браузера в пул."""
+        if self._script_id is None:
+            return
+        remove_script(self.driver, self._script_id)
+        self._script_id = None
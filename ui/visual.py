@@ -0,0 +1,277 @@
+import io
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import allure
+import numpy as np
+from PIL import Image
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+METHODS = ('pixel', 'ssim')
+
+Rect = Tuple[int, int, int, int]
+
+# Прямоугольники элементов в пикселях скриншота
+_RECTS_SCRIPT = """
+const ratio = window.devicePixelRatio || 1;
+const rects = [];
+for (const selector of arguments[0]) {
+    for (const node of document.querySelectorAll(selector)) {
+        const r = node.getBoundingClientRect();
+        if (r.width && r.height) rects.push([
+            Math.floor(r.left * ratio), Math.floor(r.top * ratio),
+            Math.ceil(r.width * ratio), Math.ceil(r.height * ratio)]);
+    }
+}
+return rects;
+"""
+
+
+def decode(png: bytes) -> np.ndarray:
+    """PNG -> массив (высота, ширина, 3) uint8."""
+    with Image.open(io.BytesIO(png)) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def phash(pixels: np.ndarray, size: int = 16) -> np.ndarray:
+    """Difference hash на ``size * size`` бит (упакованный в байты)."""
+    gray = Image.fromarray(pixels).convert('L').resize(
+        (size + 1, size), Image.BILINEAR)
+    values = np.asarray(gray, dtype=np.int16)
+    return np.packbits(values[:, 1:] > values[:, :-1])
+
+
+def hash_distance(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.unpackbits(a ^ b).sum())
+
+
+def mask_of(shape: Tuple[int, ...], rects: Iterable[Rect]) -> np.ndarray:
+    """Булева маска игнорируемых областей."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, w, h in rects:
+        mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = True
+    return mask
+
+
+def _box_mean(values: np.ndarray, k: int) -> np.ndarray:
+    """Среднее по окнам k*k через интегральное изображение."""
+    padded = np.pad(values.astype(np.float64), ((1, 0), (1, 0)))
+    s = padded.cumsum(0).cumsum(1)
+    return (s[k:, k:] - s[:-k, k:] - s[k:, :-k] + s[:-k, :-k]) / (k * k)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, window: int = 8) -> np.ndarray:
+    """Карта SSIM по яркости (окна ``window`` x ``window``)."""
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    x = a.astype(np.float32) @ weights
+    y = b.astype(np.float32) @ weights
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_x, mu_y = _box_mean(x, window), _box_mean(y, window)
+    var_x = _box_mean(x * x, window) - mu_x ** 2
+    var_y = _box_mean(y * y, window) - mu_y ** 2
+    cov = _box_mean(x * y, window) - mu_x * mu_y
+    return ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / (
+        (mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+
+
+def heatmap(baseline: np.ndarray, diff: np.ndarray,
+            mask: np.ndarray) -> bytes:
+    """Затемнённый эталон с отличиями красным и масками синим (PNG)."""
+    out = (baseline.astype(np.float32) * 0.35).astype(np.uint8)
+    strength = np.clip(diff.astype(np.float32) * 4, 0, 255).astype(np.uint8)
+    changed = strength > 0
+    out[changed] = np.stack(
+        [np.full_like(strength, 255), 255 - strength, 255 - strength],
+        axis=-1)[changed]
+    out[mask] = (out[mask] * 0.5 + np.array([0, 0, 128])).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(out).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class VisualResult:
+    """Итог сравнения кадра с эталоном."""
+
+    def __init__(self, name: str, status: str, score: float = 0.0,
+                 distance: int = 0, heatmap: Optional[bytes] = None,
+                 detail: str = '') -> None:
+        self.name = name
+        self.status = status
+        self.score = score
+        self.distance = distance
+        self.heatmap = heatmap
+        self.detail = detail
+
+    @property
+    def failed(self) -> bool:
+        return self.status in ('diff', 'size')
+
+    def __str__(self) -> str:
+        text = (f"{self.name}: {self.status} (hash {self.distance}, "
+                f"score {self.score:.4f})")
+        return f"{text} {self.detail}" if self.detail else text
+
+
+class VisualBaselines:
+    """Сравнение скриншотов с эталонами в каталоге ``{name}.png``.
+
+    Первый барьер - перцептивный хэш: если он совпал с эталонным, кадр
+    считается неизменным без попиксельного сравнения. Иначе считается
+    доля отличающихся пикселей (``pixel``) или средний SSIM (``ssim``)
+    с учётом масок. Сравнение идёт в фоновых потоках (NumPy и Pillow
+    отпускают GIL). Кадр без эталона сохраняется как новый эталон.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        method: str = 'pixel',
+        pixel_threshold: int = 16,
+        max_diff_ratio: float = 0.01,
+        min_ssim: float = 0.98,
+        update: bool = False,
+        workers: int = 2,
+    ) -> None:
+        if method not in METHODS:
+            raise ValueError(f"Неизвестный метод сравнения: {method}")
+        self.directory = directory
+        self.method = method
+        self.pixel_threshold = pixel_threshold
+        self.max_diff_ratio = max_diff_ratio
+        self.min_ssim = min_ssim
+        self.update = update
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='visual')
+        self._hashes: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        masks_path = os.path.join(directory, 'masks.json')
+        self.masks: Dict[str, List[Rect]] = {}
+        if os.path.exists(masks_path):
+            with open(masks_path, encoding='utf-8') as f:
+                self.masks = {k: [tuple(r) for r in v]
+                              for k, v in json.load(f).items()}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.png")
+
+    def _save(self, name: str, png: bytes, frame_hash: np.ndarray) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._path(name)}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(png)
+        os.replace(tmp, self._path(name))
+        with self._lock:
+            self._hashes[name] = frame_hash
+
+    def _load(self, name: str) -> np.ndarray:
+        with open(self._path(name), 'rb') as f:
+            return decode(f.read())
+
+    def compare(self, name: str, png: bytes,
+                rects: Sequence[Rect] = ()) -> VisualResult:
+        """Сравнение кадра с эталоном (выполняется в фоновом потоке)."""
+        current = decode(png)
+        frame_hash = phash(current)
+        if self.update or not os.path.exists(self._path(name)):
+            self._save(name, png, frame_hash)
+            return self._count(VisualResult(name, 'new'))
+
+        # Хэш эталона считается один раз, сам эталон читается только
+        # когда хэши разошлись
+        baseline: Optional[np.ndarray] = None
+        with self._lock:
+            baseline_hash = self._hashes.get(name)
+        if baseline_hash is None:
+            baseline = self._load(name)
+            baseline_hash = phash(baseline)
+            with self._lock:
+                self._hashes[name] = baseline_hash
+        distance = hash_distance(frame_hash, baseline_hash)
+        if distance == 0:
+            return self._count(VisualResult(name, 'same'))
+
+        if baseline is None:
+            baseline = self._load(name)
+        if baseline.shape != current.shape:
+            return self._count(VisualResult(
+                name, 'size', distance=distance,
+                detail=f"{current.shape[1]}x{current.shape[0]} вместо "
+                       f"{baseline.shape[1]}x{baseline.shape[0]}"))
+
+        mask = mask_of(current.shape, [*self.masks.get(name, ()), *rects])
+        current = current.copy()
+        current[mask] = baseline[mask]
+        diff = np.abs(current.astype(np.int16) - baseline).max(axis=-1)
+        if self.method == 'ssim':
+            score = float(ssim(baseline, current).mean())
+            failed = score < self.min_ssim
+        else:
+            score = float((diff > self.pixel_threshold).mean())
+            failed = score > self.max_diff_ratio
+        if not failed:
+            return self._count(VisualResult(name, 'match', score, distance))
+        diff[diff <= self.pixel_threshold] = 0
+        return self._count(VisualResult(name, 'diff', score, distance,
+                                         heatmap(baseline, diff, mask)))
+
+    def _count(self, result: VisualResult) -> VisualResult:
+        with self._lock:
+            self.counts[result.status] = self.counts.get(result.status,
+                                                         0) + 1
+        return result
+
+    def submit(self, name: str, png: bytes,
+               rects: Sequence[Rect] = ()) -> Future:
+        return self.executor.submit(self.compare, name, png, rects)
+
+    def for_test(self) -> 'VisualCheck':
+        return VisualCheck(self)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def report(self) -> str:
+        return ', '.join(f"{status}: {count}"
+                         for status, count in sorted(self.counts.items())) \
+            or "сравнений не было"
+
+
+class VisualCheck:
+    """Визуальные проверки одного теста; результаты собираются в finish()."""
+
+    def __init__(self, baselines: VisualBaselines) -> None:
+        self.baselines = baselines
+        self.pending: List[Tuple[str, Future]] = []
+
+    def check(self, driver: WebDriver, name: str,
+              ignore: Sequence[str] = ()) -> None:
+        """Снимок экрана и сравнение с эталоном ``name`` в фоне.
+
+        ``ignore`` - CSS-селекторы динамических блоков, которые не
+        сравниваются.
+        """
+        try:
+            rects = driver.execute_script(_RECTS_SCRIPT, list(ignore)) \
+                if ignore else []
+            png = driver.get_screenshot_as_png()
+        except WebDriverException:
+            return
+        self.pending.append((name, self.baselines.submit(
+            name, png, [tuple(rect) for rect in rects])))
+
+    def finish(self) -> List[VisualResult]:
+        """Ожидание сравнений и вложение карт отличий в Allure."""
+        results = []
+        for name, future in self.pending:
+            result = future.result()
+            results.append(result)
+            if result.heatmap is not None:
+                allure.attach(result.heatmap, name=f"{name} (visual diff)",
+                              attachment_type=allure.attachment_type.PNG)
+        self.pending.clear()
+        return results
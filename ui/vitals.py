@@ -0,0 +1,154 @@
+import json
+from typing import Any, Dict, List, Mapping, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from db.page_metrics import METRICS
+from ui.pool import restore_attribute
+
+# Ставится до скриптов страницы: LCP и CLS доступны только через observer
+_OBSERVER_SCRIPT = """
+(function() {
+    if (window.__vitals) return;
+    const vitals = window.__vitals = {lcp: null, cls: 0};
+    try { performance.setResourceTimingBufferSize(2000); } catch (e) {}
+    try {
+        new PerformanceObserver(list => {
+            const entries = list.getEntries();
+            const last = entries[entries.length - 1];
+            if (last) vitals.lcp = last.renderTime || last.loadTime ||
+                last.startTime;
+        }).observe({type: 'largest-contentful-paint', buffered: true});
+        new PerformanceObserver(list => {
+            for (const e of list.getEntries()) {
+                if (!e.hadRecentInput) vitals.cls += e.value;
+            }
+        }).observe({type: 'layout-shift', buffered: true});
+    } catch (e) {}
+})();
+"""
+
+_COLLECT_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0] || {};
+const paint = {};
+for (const e of performance.getEntriesByType('paint')) {
+    paint[e.name] = e.startTime;
+}
+const resources = performance.getEntriesByType('resource');
+const types = {};
+let transfer = nav.transferSize || 0;
+for (const r of resources) {
+    transfer += r.transferSize || 0;
+    types[r.initiatorType] = (types[r.initiatorType] || 0) + 1;
+}
+const vitals = window.__vitals || {};
+return {
+    url: location.href,
+    ttfb_ms: nav.responseStart || null,
+    fcp_ms: paint['first-contentful-paint'] || null,
+    lcp_ms: vitals.lcp === undefined ? null : vitals.lcp,
+    cls: vitals.cls === undefined ? null : vitals.cls,
+    dom_content_loaded_ms: nav.domContentLoadedEventEnd || null,
+    load_ms: nav.loadEventEnd || null,
+    requests: resources.length + 1,
+    transfer_bytes: transfer,
+    resource_types: types,
+};
+"""
+
+
+def check_budgets(page: Mapping[str, Any],
+                  budgets: Mapping[str, float]) -> List[str]:
+    """Нарушения бюджетов страницы в виде читаемых строк."""
+    violations = []
+    for metric, limit in budgets.items():
+        if metric not in METRICS:
+            raise ValueError(f"Неизвестная метрика бюджета: {metric}")
+        value = page.get(metric)
+        if value is not None and value > limit:
+            violations.append(
+                f"{page['url']}: {metric} = {value:g} > {limit:g}")
+    return violations
+
+
+class PageMetrics:
+    """Метрики загрузки страниц теста: Navigation/Resource Timing, Paint,
+    LCP и CLS.
+
+    Метрики страницы снимаются перед следующим ``driver.get`` и в
+    release(), чтобы LCP и CLS учитывали всё время теста на странице.
+    transfer_bytes у сторонних ресурсов без Timing-Allow-Origin равен 0,
+    точные байты есть в журнале сети (ui.network).
+    """
+
+    def __init__(self, driver: WebDriver) -> None:
+        self.driver = driver
+        self.pages: List[Dict[str, Any]] = []
+        self._script_id: Optional[str] = None
+        self._navigated = False
+        self._previous: Any = None
+        self._wrapper: Any = None
+
+    def install(self) -> None:
+        """Установка observer'ов и перехват driver.get."""
+        result = self.driver.execute_cdp_cmd(
+            'Page.addScriptToEvaluateOnNewDocument',
+            {'source': _OBSERVER_SCRIPT})
+        self._script_id = result.get('identifier')
+        self._previous = self.driver.__dict__.get('get')
+        original = self.driver.get
+
+        def get(url: str) -> None:
+            self.capture()
+            original(url)
+            self._navigated = True
+
+        self._wrapper = get
+        self.driver.get = get
+
+    def capture(self) -> Optional[Dict[str, Any]]:
+        """Метрики текущей страницы, если тест на неё переходил."""
+        if not self._navigated:
+            return None
+        self._navigated = False
+        try:
+            page = self.driver.execute_script(_COLLECT_SCRIPT)
+        except WebDriverException:
+            return None
+        if not page or not page['url'].startswith('http'):
+            return None
+        for metric in METRICS:
+            if isinstance(page.get(metric), float):
+                page[metric] = round(page[metric], 4 if metric == 'cls' else 1)
+        self.pages.append(page)
+        return page
+
+    def violations(self, budgets: Mapping[str, float]) -> List[str]:
+        """Нарушения бюджетов по всем страницам теста."""
+        return [v for page in self.pages for v in check_budgets(page, budgets)]
+
+    def release(self) -> None:
+        """Последний замер и снятие перехвата перед возвратом в пул."""
+        self.capture()
+        restore_attribute(self.driver, 'get', self._wrapper, self._previous)
+        if self._script_id is None:
+            return
+        try:
+            self.driver.execute_cdp_cmd(
+                'Page.removeScriptToEvaluateOnNewDocument',
+                {'identifier': self._script_id})
+        except WebDriverException:
+            pass
+        self._script_id = None
+
+    def report(self, budgets: Mapping[str, float],
+               baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+        """JSON-отчёт: страницы, бюджеты, нарушения и средние прошлых
+        прогонов."""
+        return json.dumps({
+            'pages': self.pages,
+            'budgets': dict(budgets),
+            'violations': self.violations(budgets),
+            'baseline': baseline or {},
+        }, ensure_ascii=False, indent=2)
@@ -0,0 +1,240 @@
+import time
+from typing import Any, Callable, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+from tools import instrumentation
+
+Condition = Callable[[WebDriver], Any]
+
+# Счётчик незавершённых fetch/XHR запросов и момент последней сетевой
+# активности. Ставится через CDP до загрузки каждой страницы
+# (install_network_hook), чтобы учитывать и запросы, начатые до первого
+# опроса; без CDP - лениво при первом опросе.
+_PENDING_HOOK = """
+if (!window.__pendingHook) {
+    window.__pendingHook = true;
+    window.__pending = 0;
+    window.__lastNetwork = performance.now();
+    const started = () => {
+        window.__pending++;
+        window.__lastNetwork = performance.now();
+    };
+    const finished = () => {
+        window.__pending--;
+        window.__lastNetwork = performance.now();
+    };
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            started();
+            try {
+                return origFetch.apply(this, arguments).finally(finished);
+            } catch (e) {
+                finished();
+                throw e;
+            }
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        started();
+        this.addEventListener('loadend', finished);
+        try {
+            return origSend.apply(this, arguments);
+        } catch (e) {
+            this.removeEventListener('loadend', finished);
+            finished();
+            throw e;
+        }
+    };
+}
+"""
+
+_PENDING_QUERY = _PENDING_HOOK + """
+let lastEnd = window.__lastNetwork;
+for (const e of performance.getEntriesByType('resource')) {
+    lastEnd = Math.max(lastEnd, e.responseEnd);
+}
+return [window.__pending, performance.now() - lastEnd];
+"""
+
+_MUTATION_HOOK = """
+if (!window.__mutationHook) {
+    window.__mutationHook = true;
+    window.__lastMutation = performance.now();
+    new MutationObserver(() => { window.__lastMutation = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true});
+}
+return performance.now() - window.__lastMutation;
+"""
+
+_ELEMENT_RECT = """
+const el = document.querySelector(arguments[0]);
+if (!el) return null;
+const r = el.getBoundingClientRect();
+const style = window.getComputedStyle(el);
+const visible = r.width > 0 && r.height > 0 &&
+    style.visibility !== 'hidden' && style.display !== 'none';
+return [r.x, r.y, r.width, r.height, visible];
+"""
+
+
+def document_ready(driver: WebDriver) -> bool:
+    """document.readyState == 'complete'."""
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def install_network_hook(driver: WebDriver) -> None:
+    """Установка счётчика fetch/XHR до загрузки каждой новой страницы."""
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                           {'source': _PENDING_HOOK})
+
+
+def network_idle(idle_ms: int = 500) -> Condition:
+    """Нет активных fetch/XHR и сетевой активности за последние idle_ms."""
+    def condition(driver: WebDriver) -> bool:
+        pending, since_last = driver.execute_script(_PENDING_QUERY)
+        return pending == 0 and since_last >= idle_ms
+    return condition
+
+
+def dom_quiet(quiet_ms: int = 300) -> Condition:
+    """DOM не менялся последние quiet_ms."""
+    def condition(driver: WebDriver) -> bool:
+        return driver.execute_script(_MUTATION_HOOK) >= quiet_ms
+    return condition
+
+
+def element_present(selector: str) -> Condition:
+    """Элемент есть в DOM (без неявного ожидания find_elements)."""
+    def condition(driver: WebDriver) -> bool:
+        return driver.execute_script(_ELEMENT_RECT, selector) is not None
+    return condition
+
+
+def element_visible(selector: str) -> Condition:
+    """Элемент есть в DOM и видим."""
+    def condition(driver: WebDriver) -> bool:
+        rect = driver.execute_script(_ELEMENT_RECT, selector)
+        return bool(rect and rect[4])
+    return condition
+
+
+def element_stable(selector: str, stable_ms: int = 200) -> Condition:
+    """Элемент видим и не сдвигался последние stable_ms."""
+    state = {'rect': None, 'since': 0.0}
+
+    def condition(driver: WebDriver) -> bool:
+        rect = driver.execute_script(_ELEMENT_RECT, selector)
+        now = time.perf_counter()
+        if not rect or not rect[4]:
+            state['rect'] = None
+            return False
+        if rect != state['rect']:
+            state['rect'] = rect
+            state['since'] = now
+            return False
+        return (now - state['since']) * 1000 >= stable_ms
+    return condition
+
+
+def all_of(*conditions: Condition) -> Condition:
+    """Все условия выполнены."""
+    def condition(driver: WebDriver) -> bool:
+        return all(cond(driver) for cond in conditions)
+    return condition
+
+
+class WaitResult:
+    """Результат одного ожидания: сколько заняло и сколько было отведено."""
+
+    def __init__(self, name: str, ok: bool, elapsed: float, timeout: float,
+                 attempts: int) -> None:
+        self.name = name
+        self.ok = ok
+        self.elapsed = elapsed
+        self.timeout = timeout
+        self.attempts = attempts
+
+    def __str__(self) -> str:
+        status = "✅" if self.ok else "⏱"
+        return (f"{status} {self.name}: {self.elapsed:.2f}s из "
+                f"{self.timeout:.1f}s ({self.attempts} проверок)")
+
+
+class Waiter:
+    """Ожидание условий с нарастающим интервалом опроса.
+
+    Каждое ожидание сохраняется в ``results``, чтобы было видно, сколько
+    времени оно реально заняло по сравнению с бюджетом.
+    """
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        timeout: float = 10.0,
+        poll: float = 0.05,
+        max_poll: float = 0.5,
+        backoff: float = 1.5,
+    ) -> None:
+        self.driver = driver
+        self.timeout = timeout
+        self.poll = poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.results: List[WaitResult] = []
+
+    def until(
+        self,
+        condition: Condition,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+        raise_on_timeout: bool = True,
+    ) -> WaitResult:
+        """Ожидание выполнения условия не дольше timeout секунд."""
+        timeout = self.timeout if timeout is None else timeout
+        name = name or getattr(condition, '__name__', 'condition')
+        started = time.perf_counter()
+        deadline = started + timeout
+        interval = self.poll
+        attempts = 0
+        ok = False
+        while True:
+            attempts += 1
+            try:
+                ok = bool(condition(self.driver))
+            except WebDriverException:
+                ok = False
+            now = time.perf_counter()
+            if ok or now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+            interval = min(interval * self.backoff, self.max_poll)
+
+        result = WaitResult(name, ok, time.perf_counter() - started, timeout,
+                            attempts)
+        self.results.append(result)
+        instrumentation.add('wait_s', result.elapsed)
+        if not ok and raise_on_timeout:
+            raise TimeoutException(f"Ожидание '{name}' превысило {timeout}s")
+        return result
+
+    def page_ready(self, timeout: float = 15.0, quiet_ms: int = 300,
+                   raise_on_timeout: bool = False) -> WaitResult:
+        """Страница загружена, сеть и DOM успокоились."""
+        return self.until(
+            all_of(document_ready, network_idle(quiet_ms), dom_quiet(quiet_ms)),
+            timeout=timeout,
+            name='page_ready',
+            raise_on_timeout=raise_on_timeout,
+        )
+
+    def report(self) -> str:
+        """Сводка по всем ожиданиям теста."""
+        total = sum(r.elapsed for r in self.results)
+        budget = sum(r.timeout for r in self.results)
+        lines = [str(r) for r in self.results]
+        lines.append(f"Итого: {total:.2f}s из {budget:.1f}s")
+        return "\n".join(lines)
@@ -0,0 +1,203 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import psutil
+from selenium.webdriver.chrome.webdriver import WebDriver
+
+MB = 1024 * 1024
+
+
+def driver_pid(driver: WebDriver) -> Optional[int]:
+    """PID процесса chromedriver, запущенного для браузера."""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+def process_tree(pid: int) -> List[psutil.Process]:
+    """chromedriver и все его потомки (Chrome, рендереры, GPU)."""
+    try:
+        root = psutil.Process(pid)
+        return [root, *root.children(recursive=True)]
+    except psutil.Error:
+        return []
+
+
+def kill_tree(processes: Iterable[psutil.Process]) -> int:
+    """Завершение ещё живых процессов; возвращает число убитых.
+
+    psutil проверяет время создания процесса, поэтому PID, занятый
+    после выхода браузера другим процессом, не пострадает.
+    """
+    killed = []
+    for process in processes:
+        try:
+            process.kill()
+            killed.append(process)
+        except psutil.Error:
+            pass
+    psutil.wait_procs(killed, timeout=5)
+    return len(killed)
+
+
+class _Watched:
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.processes: Dict[int, psutil.Process] = {}
+        self.rss = 0
+        self.cpu = 0.0
+        self.peak_rss = 0
+        self.peak_cpu = 0.0
+
+
+class MemoryWatchdog:
+    """Фоновый замер RSS и CPU дерева процессов каждого браузера пула.
+
+    Браузер, превысивший ``max_rss_mb`` или не ответивший за
+    ``unresponsive_s``, пул пересоздаёт при возврате. Все PID, которые
+    видел сторож, добиваются в конце сессии, если пережили ``quit()``.
+    """
+
+    def __init__(self, interval: float = 1.0, max_rss_mb: float = 1500,
+                 unresponsive_s: float = 10.0) -> None:
+        self.interval = interval
+        self.max_rss = max_rss_mb * MB
+        self.unresponsive_s = unresponsive_s
+        self._watched: Dict[int, _Watched] = {}
+        self._seen: Dict[int, psutil.Process] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='browser-watchdog')
+        self.over_memory = 0
+        self.unresponsive = 0
+        self.reaped = 0
+        self.test_peaks: Dict[str, float] = {}
+        self._thread.start()
+
+    def _sample(self, watched: _Watched) -> None:
+        rss, cpu = 0, 0.0
+        alive = {}
+        for process in process_tree(watched.pid):
+            # cpu_percent считается от прошлого вызова на том же объекте
+            process = watched.processes.get(process.pid, process)
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+            except psutil.Error:
+                continue
+            alive[process.pid] = process
+        with self._lock:
+            watched.processes = alive
+            self._seen.update(alive)
+            watched.rss, watched.cpu = rss, cpu
+            watched.peak_rss = max(watched.peak_rss, rss)
+            watched.peak_cpu = max(watched.peak_cpu, cpu)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                watched = list(self._watched.values())
+            for item in watched:
+                self._sample(item)
+
+    def watch(self, driver: WebDriver) -> None:
+        """Начало наблюдения за браузером после запуска."""
+        pid = driver_pid(driver)
+        if pid is None:
+            return
+        watched = _Watched(pid)
+        with self._lock:
+            self._watched[id(driver)] = watched
+        self._sample(watched)
+
+    def unwatch(self, driver: WebDriver) -> List[psutil.Process]:
+        """Конец наблюдения; возвращает процессы браузера."""
+        with self._lock:
+            watched = self._watched.pop(id(driver), None)
+        return list(watched.processes.values()) if watched else []
+
+    def begin(self, driver: WebDriver) -> None:
+        """Сброс пиков перед тестом."""
+        with self._lock:
+            watched = self._watched.get(id(driver))
+            if watched is not None:
+                watched.peak_rss, watched.peak_cpu = watched.rss, watched.cpu
+
+    def end(self, driver: WebDriver, nodeid: str) -> Dict[str, float]:
+        """Пик памяти и CPU браузера за тест."""
+        with self._lock:
+            watched = self._watched.get(id(driver))
+        if watched is None:
+            return {}
+        self._sample(watched)
+        peak = {'peak_rss_mb': round(watched.peak_rss / MB, 1),
+                'peak_cpu_percent': round(watched.peak_cpu, 1)}
+        self.test_peaks[nodeid] = peak['peak_rss_mb']
+        return peak
+
+    def responsive(self, driver: WebDriver) -> bool:
+        """Ответ на простую команду за ``unresponsive_s`` секунд."""
+        done = threading.Event()
+        alive: List[bool] = []
+
+        def ping() -> None:
+            try:
+                driver.window_handles
+                alive.append(True)
+            except Exception:
+                pass
+            finally:
+                done.set()
+
+        threading.Thread(target=ping, daemon=True).start()
+        return done.wait(self.unresponsive_s) and bool(alive)
+
+    def check(self, driver: WebDriver) -> Optional[str]:
+        """Причина пересоздать браузер или None."""
+        if not self.responsive(driver):
+            self.unresponsive += 1
+            return 'unresponsive'
+        with self._lock:
+            watched = self._watched.get(id(driver))
+        if watched is not None:
+            self._sample(watched)
+            if watched.rss > self.max_rss:
+                self.over_memory += 1
+                return 'memory'
+        return None
+
+    def kill(self, driver: WebDriver) -> None:
+        """Принудительное завершение дерева процессов браузера."""
+        with self._lock:
+            watched = self._watched.get(id(driver))
+        if watched is not None:
+            self._sample(watched)
+            self.reaped += kill_tree(watched.processes.values())
+
+    def reap(self, processes: Iterable[psutil.Process]) -> None:
+        """Добивание процессов, переживших quit()."""
+        self.reaped += kill_tree(p for p in processes if p.is_running())
+
+    def close(self) -> None:
+        """Остановка замеров и зачистка всех виденных процессов."""
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 2)
+        with self._lock:
+            seen = list(self._seen.values())
+        self.reap(seen)
+
+    def report(self) -> str:
+        """Пики памяти по тестам и оценка числа воркеров на хост."""
+        lines = [f"{nodeid}: {peak} MB"
+                 for nodeid, peak in sorted(self.test_peaks.items(),
+                                            key=lambda item: -item[1])]
+        lines.append(f"over_memory: {self.over_memory}, "
+                     f"unresponsive: {self.unresponsive}, "
+                     f"reaped: {self.reaped}")
+        if self.test_peaks:
+            peak = max(self.test_peaks.values())
+            available = psutil.virtual_memory().available / MB
+            lines.append(f"suggested_workers: "
+                         f"{max(1, int(available * 0.8 // max(peak, 1)))} "
+                         f"(доступно {available:.0f} MB, пик {peak} MB)")
+        return "\n".join(lines)